@@ -9,6 +9,7 @@ import uuid
 import logging
 from datetime import datetime
 from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -35,7 +36,10 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from typing import Optional
+from src.search.serialize import encode_promotion, encode_response, parse_fields
+from src.utils.dates import duration_text, parse_datetime
 from src.utils.fetcher import login, fetch_promotions_data
+from src.utils.thai_text import normalize, tokenize
 
 def fetch_promotions(token: str) -> list:
     """Wrapper for fetch_promotions_data."""
@@ -49,8 +53,15 @@ BLOCKED_KEYWORDS = {
     'android'
 }
 
+# Words never stored as keywords (normalized, see src.utils.thai_text.normalize)
+KEYWORD_STOP_WORDS = {normalize(w) for w in ('none', 'null', 'ที่', 'และ', 'หรือ', 'ของ', 'ใน')}
+MAX_KEYWORDS = 30
+
 def process_promotions(raw_promotions: list) -> list:
-    """Transform raw API data to our format."""
+    """
+    Transform raw API data to our format.
+    Bump src.utils.sync.PROCESSING_VERSION when the output for the same input changes.
+    """
     results = []
     
     for promo in raw_promotions:
@@ -59,20 +70,7 @@ def process_promotions(raw_promotions: list) -> list:
         if any(keyword in title_lower for keyword in BLOCKED_KEYWORDS):
             continue
             
-        duration = ""
-        try:
-            display_to = promo.get("display_to")
-            if display_to:
-                end_date = datetime.strptime(display_to.split()[0], "%Y-%m-%d")
-                days_left = (end_date - datetime.now()).days
-                if days_left > 0:
-                    duration = f"เหลือเวลาอีก {days_left} วัน"
-                elif days_left == 0:
-                    duration = "วันนี้วันสุดท้าย"
-                else:
-                    duration = "หมดอายุแล้ว"
-        except:
-            pass
+        duration = duration_text(parse_datetime(promo.get("display_to")))
         
         attachments = []
         for att in promo.get("attachments", []) or []:
@@ -81,8 +79,10 @@ def process_promotions(raw_promotions: list) -> list:
                 "url": att.get("uri", "")
             })
         
-        text = f"{promo.get('title', '')} {promo.get('description', '')} {promo.get('category', '')}"
-        keywords = list(set([w.lower() for w in text.split() if len(w) > 2 and w.lower() not in {'none', 'null', 'ที่', 'และ', 'หรือ', 'ของ', 'ใน'} and not w.endswith(')') and not w.startswith('(')]))[:30]
+        # Keywords: segmented, normalized tokens (title first), without duplicates
+        text = f"{promo.get('title', '')} {promo.get('description', '')} {promo.get('category') or ''}"
+        tokens = dict.fromkeys(t for t in tokenize(text) if len(t) > 1 and t not in KEYWORD_STOP_WORDS)
+        keywords = list(tokens)[:MAX_KEYWORDS]
         
         results.append({
             "id": promo.get("id"),
@@ -134,7 +134,12 @@ class handler(BaseHTTPRequestHandler):
 
     def do_GET(self):
         try:
+            params = parse_qs(urlparse(self.path).query)
+            # e.g. fields=id,title,duration,link - only these keys are returned per item
+            fields = parse_fields(params.get('fields', [''])[0])
             promotions = get_promotions_with_cache()
+            # The cache refresh time identifies this list of promotions
+            version = ("promotions", _cache["timestamp"])
             
             self.send_response(200)
             self.send_header("Content-Type", "application/json")
@@ -144,10 +149,9 @@ class handler(BaseHTTPRequestHandler):
             
             response = {
                 "success": True,
-                "count": len(promotions),
-                "data": promotions
+                "count": len(promotions)
             }
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+            self.wfile.write(encode_response(response, [encode_promotion(p, version, fields) for p in promotions]))
         except Exception as e:
             self.send_response(500)
             self.send_header("Content-Type", "application/json")
@@ -1,6 +1,11 @@
 """
 Vercel API Route: /api/search
 Handles search requests with pagination, filtering, and CORS support.
+POST answers a batch of searches in one request:
+    {"queries": [{"q": "iphone", "type": "...", "page": 1, "limit": 12, "fields": "id,title"}, ...],
+     "fields": "default fields for every query"}
+and returns {"success": true, "results": [{"meta", "facets", "data"}, ...]} in the same order.
+A malformed body or search gets a 400 with {"success": false, "error": ...}.
 """
 import json
 import os
@@ -12,20 +17,69 @@ from urllib.parse import parse_qs, urlparse
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 try:
-    from src.search.engine import SearchEngine
+    from src.utils import startup
 except ImportError:
     # Fallback for Vercel environment where src might be unpredictable
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from src.utils import startup
+from src.search.serialize import HIT_FIELDS, encode_hit, encode_response, parse_fields
+
+def _create_search_engine():
     from src.search.engine import SearchEngine
+    return SearchEngine()
+
+# Initialize engine once, on the first request (importing does no I/O)
+search_engine = startup.Lazy("search_engine", _create_search_engine)
+if startup.STARTUP_MODE == "eager":
+    search_engine.get()
+
+FILTER_PARAMS = {'category': 'category', 'type': 'promotion_type', 'bank': 'bank', 'brand': 'brand'}
+MAX_BATCH_QUERIES = 50
+# Largest page a batched search may ask for
+MAX_BATCH_LIMIT = 100
 
-# Initialize engine once
-search_engine = SearchEngine()
+def page_meta(total: int, page: int, limit: int) -> dict:
+    return {"total": total, "page": page, "limit": limit, "total_pages": (total + limit - 1) // limit}
+
+def _int_param(q: dict, name: str, default: int, low: int, high: int = None) -> int:
+    value = q.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if value < low or (high is not None and value > high):
+        raise ValueError(f"{name} must be between {low} and {high}" if high else f"{name} must be at least {low}")
+    return value
+
+def parse_search(q, default_fields: str) -> dict:
+    """One search of a POST batch, validated. Raises ValueError if it is malformed."""
+    if not isinstance(q, dict):
+        raise ValueError("each search must be an object")
+    # null counts as not given
+    q = {name: value for name, value in q.items() if value is not None}
+    for name in ('q', 'fields', *FILTER_PARAMS):
+        if not isinstance(q.get(name, ''), str):
+            raise ValueError(f"{name} must be a string")
+    page = _int_param(q, 'page', 1, 1)
+    limit = _int_param(q, 'limit', 20, 1, MAX_BATCH_LIMIT)
+    return {
+        'q': q.get('q', ''),
+        'filters': {facet: q.get(param, '') for param, facet in FILTER_PARAMS.items()},
+        'offset': (page - 1) * limit,
+        'limit': limit,
+        'page': page,
+        'fields': parse_fields(q.get('fields', default_fields), HIT_FIELDS),
+    }
 
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
@@ -38,50 +92,45 @@ class handler(BaseHTTPRequestHandler):
             query = params.get('q', [''])[0]
             page = int(params.get('page', ['1'])[0])
             limit = int(params.get('limit', ['20'])[0])
-            category = params.get('category', [''])[0]
-            promo_type = params.get('type', [''])[0]
-            
-            # Perform search
-            if not query and not category and not promo_type:
-                # Default to latest if no query
-                results = search_engine.get_latest(n=100)
-            else:
-                results = search_engine.search(query)
-            
-            # Apply filters
-            if category:
-                results = [r for r in results if r.get('category') == category]
-            
-            if promo_type:
-                results = [r for r in results if r.get('promotion_type') == promo_type]
-            
-            # Pagination
-            total_count = len(results)
-            total_pages = (total_count + limit - 1) // limit
+            # Facet filters: query parameter -> facet (see src.search.facets)
+            filters = {facet: params.get(param, [''])[0] for param, facet in FILTER_PARAMS.items()}
+            show_timings = params.get('timings', [''])[0] not in ('', '0')
+            # e.g. fields=id,title,duration,link - only these keys are returned per item
+            fields = parse_fields(params.get('fields', [''])[0], HIT_FIELDS)
             
             start_idx = (page - 1) * limit
             end_idx = start_idx + limit
             
-            paginated_results = results[start_idx:end_idx]
+            # Perform search
+            if not query and not any(filters.values()):
+                # Default to the latest 100 if no query (newest first, with facet counts over all)
+                results, _, facet_counts, version = search_engine.search_filtered('', {}, 0, 100)
+                total_count = len(results)
+                paginated_results = results[start_idx:end_idx]
+            else:
+                # Filters are bitset intersections with the query's candidates;
+                # only the requested page is ranked and highlighted
+                paginated_results, total_count, facet_counts, version = search_engine.search_filtered(
+                    query, filters, start_idx, limit)
             
             # Response
             response = {
                 "success": True,
-                "data": paginated_results,
-                "meta": {
-                    "total": total_count,
-                    "page": page,
-                    "limit": limit,
-                    "total_pages": total_pages
-                }
+                "meta": page_meta(total_count, page, limit),
+                # Result counts per filter value, for drawing filter chips
+                "facets": {param: facet_counts[facet] for param, facet in FILTER_PARAMS.items()}
             }
+            startup.mark("first_response")
+            if show_timings:
+                response["meta"]["startup_ms"] = startup.timings()
             
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Cache-Control', 's-maxage=60, stale-while-revalidate')
             self.end_headers()
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            # Items come from the per-record encoded bytes cache
+            self.wfile.write(encode_response(response, [encode_hit(r, version, fields) for r in paginated_results]))
             
         except Exception as e:
             self.send_response(500)
@@ -89,3 +138,48 @@ class handler(BaseHTTPRequestHandler):
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
             self.wfile.write(json.dumps({"success": False, "error": str(e)}).encode('utf-8'))
+
+    def _send_error(self, status: int, message: str):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(json.dumps({"success": False, "error": message}).encode('utf-8'))
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            queries = body.get('queries') if isinstance(body, dict) else None
+            if not isinstance(queries, list) or not 0 < len(queries) <= MAX_BATCH_QUERIES:
+                raise ValueError(f"queries must be a list of 1-{MAX_BATCH_QUERIES} searches")
+            default_fields = body.get('fields') or ''
+            if not isinstance(default_fields, str):
+                raise ValueError("fields must be a string")
+            searches = [parse_search(q, default_fields) for q in queries]
+        except (ValueError, TypeError) as e:
+            # Includes invalid JSON and non-UTF-8 bodies (both ValueErrors)
+            self._send_error(400, str(e))
+            return
+        
+        try:
+            # One snapshot for the whole batch; synonym expansions are looked up once
+            results, version = search_engine.search_batch(searches)
+            
+            parts = []
+            for search, (hits, total, facet_counts) in zip(searches, results):
+                envelope = {
+                    "meta": page_meta(total, search['page'], search['limit']),
+                    "facets": {param: facet_counts[facet] for param, facet in FILTER_PARAMS.items()}
+                }
+                parts.append(encode_response(envelope, [encode_hit(h, version, search['fields']) for h in hits]))
+            startup.mark("first_response")
+            
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            self.wfile.write(b'{"success":true,"results":[' + b','.join(parts) + b']}')
+            
+        except Exception as e:
+            self._send_error(500, str(e))
@@ -0,0 +1,168 @@
+"""
+Search and ingestion benchmark on the synthetic corpus (benchmarks/corpus.py).
+For each corpus size, in a fresh Python process: JSON load time, index build
+time, process_promotions (ingestion) time, search latency percentiles per
+query class with the result cache disabled, and peak memory (max RSS).
+Results are written as JSON; compare two runs with benchmarks/compare.py.
+Usage: python -m benchmarks.bench_search [--sizes 200,10k,100k,1m] [--runs 20] [--seed 0] [--out FILE]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# 1m works too, but needs several GB of memory and a few minutes
+DEFAULT_SIZES = '200,10k,100k'
+# Query class -> queries; every class is timed separately
+QUERY_MIX = {
+    'exact': ['iphone', 'ผ่อน', 'trade in', 'galaxy'],
+    'synonym': ['ไอโฟน', 'กสิกร', 'แมค', 'ซัมซุง'],
+    'fuzzy': ['iphnoe', 'samsnug', 'macbok air'],
+    'zero_result': ['zzqxv', 'qwxyzk'],
+}
+PAGE_SIZE = 12
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().lower()
+    for suffix, factor in (('k', 1_000), ('m', 1_000_000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def measure(size: int, runs: int, seed: int) -> dict:
+    """Benchmark one corpus size in this process."""
+    from benchmarks.corpus import generate, to_api_record
+    from src.search import engine as E
+    from src.search.cache import LRUCache
+
+    result = {'size': size}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = os.path.join(tmp, 'promotions.json')
+        with open(data_file, 'w', encoding='utf-8') as f:
+            json.dump(generate(size, seed), f, ensure_ascii=False)
+        result['file_mb'] = round(os.path.getsize(data_file) / 1e6, 2)
+        rss_before = max_rss_mb()
+
+        # Same steps as SearchEngine.load_data
+        started = time.perf_counter()
+        with open(data_file, 'rb') as f:
+            all_promos = json.loads(f.read())
+        records = E.active_records(all_promos)
+        loaded = time.perf_counter()
+        snapshot = E.SearchSnapshot.build(records, 1, E.NORMALIZED_STOP_WORDS)
+        built = time.perf_counter()
+        result['active'] = len(records)
+        result['load_ms'] = round((loaded - started) * 1000, 1)
+        result['index_build_ms'] = round((built - loaded) * 1000, 1)
+        result['peak_rss_mb'] = round(max_rss_mb(), 1)
+        result['index_rss_mb'] = round(max_rss_mb() - rss_before, 1)
+
+        # An engine serving the snapshot, with no data file, refresh or result cache
+        E.DATA_FILE = Path(tmp) / 'missing.json'
+        E.SNAPSHOT_FILE = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = E.SearchEngine(refresh_interval=0)
+        engine._publish(snapshot)
+        engine.result_cache = LRUCache(maxsize=0)
+
+        search = {}
+        for kind, queries in QUERY_MIX.items():
+            engine.search_page(queries[0], 0, PAGE_SIZE)  # warm up
+            latencies = []
+            for _ in range(runs):
+                for query in queries:
+                    start = time.perf_counter()
+                    engine.search_page(query, 0, PAGE_SIZE)
+                    latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            search[kind] = {f'p{p}_ms': round(percentile(latencies, p), 3) for p in (50, 95, 99)}
+            search[kind]['total'] = engine.search_page(queries[0], 0, PAGE_SIZE)[1]
+        result['search'] = search
+
+        from api.promotions import process_promotions
+        raw = [to_api_record(p) for p in all_promos]
+        started = time.perf_counter()
+        process_promotions(raw)
+        result['ingest_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        result['peak_rss_mb'] = round(max_rss_mb(), 1)
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma-separated corpus sizes, e.g. 200,10k,1m')
+    parser.add_argument('--runs', type=int, default=20, help='repetitions of each query')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='result file (default benchmarks/results/<time>.json)')
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(measure(args.child, args.runs, args.seed)))
+        return
+
+    results = []
+    for size in map(parse_size, args.sizes.split(',')):
+        # Fresh process per size: clean peak memory and no warm caches
+        out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_search', '--child', str(size),
+                              '--runs', str(args.runs), '--seed', str(args.seed)],
+                             cwd=PROJECT_ROOT, check=True, capture_output=True, text=True).stdout
+        result = json.loads(out.splitlines()[-1])
+        results.append(result)
+        search = ', '.join(f"{kind} p50 {r['p50_ms']}ms p99 {r['p99_ms']}ms" for kind, r in result['search'].items())
+        print(f"{size:>8}: load {result['load_ms']}ms, index {result['index_build_ms']}ms, "
+              f"ingest {result['ingest_ms']}ms, peak {result['peak_rss_mb']}MB | {search}")
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': args.runs,
+        'seed': args.seed,
+        'queries': QUERY_MIX,
+        'results': results,
+    }
+    out_file = args.out or os.path.join(PROJECT_ROOT, 'benchmarks', 'results', f'{datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(out_file)), exist_ok=True)
+    with open(out_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {out_file}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Compare two benchmark result files from benchmarks/bench_search.py.
+Prints each metric per corpus size with the relative change (positive = slower/bigger).
+Usage: python -m benchmarks.compare OLD.json NEW.json
+"""
+import json
+import sys
+
+METRICS = ('load_ms', 'index_build_ms', 'ingest_ms', 'peak_rss_mb')
+
+
+def flatten(result: dict) -> dict:
+    values = {metric: result[metric] for metric in METRICS if metric in result}
+    for kind, latencies in result.get('search', {}).items():
+        for name, value in latencies.items():
+            if name.endswith('_ms'):
+                values[f'{kind}.{name}'] = value
+    return values
+
+
+def main():
+    with open(sys.argv[1], encoding='utf-8') as f:
+        old = {r['size']: flatten(r) for r in json.load(f)['results']}
+    with open(sys.argv[2], encoding='utf-8') as f:
+        new = {r['size']: flatten(r) for r in json.load(f)['results']}
+
+    for size in sorted(old.keys() & new.keys()):
+        print(f"size {size}")
+        for metric, before in old[size].items():
+            after = new[size].get(metric)
+            if after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            print(f"  {metric:<24}{before:>12}{after:>12}{change:>10}")
+
+
+if __name__ == '__main__':
+    main()
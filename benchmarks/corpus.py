@@ -0,0 +1,118 @@
+"""
+Synthetic promotions corpus for benchmarks.
+generate(n) returns records in the promotions.json schema: Thai/English titles
+and descriptions built from the brands and banks in SearchEngine's SYNONYMS,
+attachments with Thai file names, and start/end dates around today (a few
+already expired, like the real feed). Output is deterministic for a seed.
+to_api_record() turns a record back into the upstream API shape that
+process_promotions ingests.
+Usage: python -m benchmarks.corpus SIZE OUT.json [--seed N]
+"""
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+
+from src.search.engine import SYNONYMS
+from src.search.facets import BANKS, BRANDS
+
+PROMOTION_TYPES = [
+    'โปรโมชั่นประจำเดือน', 'ปรับราคาสินค้า', 'Incentive', 'คู่มือการใช้เครื่องรูดบัตร',
+    'Pre-Booking/สินค้าใหม่', 'โปรโมชั่นเครือข่ายมือถือ', 'Trade In', 'โปรธนาคาร/Code ผ่อน', '',
+]
+CATEGORIES = [None] * 12 + ['Mobile Cable', 'Gaming Gear', 'Mouse & Keyboards', 'Printer', 'IT Accessories', 'Adapter']
+PRODUCTS = ['iPhone 17 Pro', 'iPad Air', 'MacBook Air M4', 'AirPods Pro', 'Apple Watch Series 11', 'Galaxy S26',
+            'ThinkPad X1', 'XPS 13', 'ROG Ally', 'PlayStation 5', 'EcoTank L3250', 'PIXMA G3020', 'Surface Pro',
+            'หูฟังไร้สาย', 'สายชาร์จ USB-C', 'เคสกันกระแทก', 'โน๊ตบุ๊คเกมมิ่ง', 'เครื่องปริ้นเตอร์']
+TITLE_TEMPLATES = [
+    'โปรโมชั่น {product} ประจำเดือน{month}',
+    'แจ้งปรับราคา {product} มีผลตั้งแต่ {day} {month}',
+    'ผ่อน 0% {months} เดือน กับบัตรเครดิต{bank} ซื้อ {product}',
+    '{brand} {product} Trade In รับส่วนลดสูงสุด {discount} บาท',
+    'Incentive {brand} {month} {thai_year}',
+    'Pre-Booking {product} สินค้าใหม่',
+    'Special price {product} for {bank} cardholders',
+]
+SENTENCES = [
+    'รายละเอียดตามไฟล์แนบ',
+    'เริ่ม {day} {month} เป็นต้นไป',
+    'ลดราคาสูงสุด {discount} บาท เฉพาะสาขาที่ร่วมรายการ',
+    'ผ่อนชำระ 0% นานสูงสุด {months} เดือน ผ่านบัตรเครดิต{bank}',
+    'Click ที่รูปเพื่อดาวน์โหลดไฟล์ ---->',
+    'สินค้ามีจำนวนจำกัด สงวนสิทธิ์การเปลี่ยนแปลงโดยไม่ต้องแจ้งให้ทราบล่วงหน้า',
+    'Valid for {brand} products only, while stocks last.',
+    'แจ้งปรับราคาสินค้า SKU ตามรายการด้านล่าง',
+]
+MONTHS = ['มกราคม', 'กุมภาพันธ์', 'มีนาคม', 'เมษายน', 'พฤษภาคม', 'มิถุนายน',
+          'กรกฎาคม', 'สิงหาคม', 'กันยายน', 'ตุลาคม', 'พฤศจิกายน', 'ธันวาคม']
+# Brand and bank spellings that SearchEngine expands as synonyms
+BRAND_WORDS = [w for spellings in BRANDS.values() for w in spellings if w in SYNONYMS]
+BANK_WORDS = [w for spellings in BANKS.values() for w in spellings if w in SYNONYMS]
+
+
+def _text(rng: random.Random, template: str, now: datetime) -> str:
+    return template.format(
+        product=rng.choice(PRODUCTS), brand=rng.choice(BRAND_WORDS), bank=rng.choice(BANK_WORDS),
+        month=rng.choice(MONTHS), day=rng.randint(1, 28), months=rng.choice((3, 6, 10)),
+        discount=rng.choice((500, 1000, 2000, 5000)), thai_year=now.year + 543,
+    )
+
+
+def generate(n: int, seed: int = 0, now: datetime = None) -> list:
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    promotions = []
+    for i in range(n):
+        promo_id = 100000 + i
+        title = _text(rng, rng.choice(TITLE_TEMPLATES), now)
+        description = '\n'.join(_text(rng, rng.choice(SENTENCES), now) for _ in range(rng.randint(1, 5)))
+        start = now - timedelta(days=rng.randint(0, 60))
+        # About 1 in 10 already ended
+        end = now + timedelta(days=rng.randint(-20, 180), hours=rng.randint(0, 23))
+        attachments = [
+            {'text': f'{rng.choice(PRODUCTS)} {rng.choice(MONTHS)}',
+             'url': f'https://static.example.com/{start:%Y%m%d}/{promo_id}-{k}-ไฟล์แนบ {rng.choice(MONTHS)}.jpg'}
+            for k in range(rng.choice((0, 1, 1, 2, 3)))
+        ]
+        words = list(dict.fromkeys(w.lower() for w in title.split() if len(w) > 1))
+        promotions.append({
+            'id': promo_id,
+            'title': title,
+            'link': f'https://vrcomseven.com/promotions/{promo_id}',
+            'description': description,
+            'content': description,
+            'duration': '',
+            'start_date': f'{start:%Y-%m-%d %H:%M:%S}',
+            'end_date': f'{end:%Y-%m-%d %H:%M:%S}',
+            'category': rng.choice(CATEGORIES),
+            'promotion_type': rng.choice(PROMOTION_TYPES),
+            'attachments': attachments,
+            'keywords': words[:30],
+        })
+    return promotions
+
+
+def to_api_record(promo: dict) -> dict:
+    """promo in the upstream /v1/promotions shape (input of process_promotions)."""
+    return {
+        'id': promo['id'],
+        'title': promo['title'],
+        'description': promo['description'],
+        'category': promo['category'],
+        'start_date': promo['start_date'],
+        'display_from': promo['start_date'],
+        'display_to': promo['end_date'],
+        'promotion_type': {'name': promo['promotion_type']},
+        'attachments': [{'title': att['text'], 'uri': att['url']} for att in promo['attachments']],
+    }
+
+
+def main():
+    size, out = int(sys.argv[1]), sys.argv[2]
+    seed = int(sys.argv[sys.argv.index('--seed') + 1]) if '--seed' in sys.argv[3:-1] else 0
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(generate(size, seed), f, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
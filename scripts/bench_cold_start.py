@@ -0,0 +1,59 @@
+"""
+Benchmark cold start: time from importing the engine to the first query result,
+loading data/promotions.json directly vs. the prebuilt promotions.snapshot.
+Each run is a fresh Python process; no network access (data sync is disabled).
+Usage: python scripts/bench_cold_start.py [runs] [query]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from src.search.engine import DATA_FILE, SNAPSHOT_FILE, write_snapshot_file
+
+CHILD = """
+import contextlib, io, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.search import engine as E
+E.SearchEngine.check_and_update_data = lambda self: None
+if {mode!r} == "json":
+    E.SNAPSHOT_FILE = None
+with contextlib.redirect_stdout(io.StringIO()):
+    engine = E.SearchEngine(refresh_interval=0)
+t1 = time.perf_counter()
+hits, total = engine.search_page({query!r}, 0, 12)
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t0, total)
+"""
+
+
+def run(mode: str, query: str):
+    code = CHILD.format(root=PROJECT_ROOT, mode=mode, query=query)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    load, first_query, total = out.split()
+    return float(load), float(first_query), int(total)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    query = sys.argv[2] if len(sys.argv) > 2 else "iphone"
+
+    if write_snapshot_file(DATA_FILE, SNAPSHOT_FILE):
+        print(f"Built {SNAPSHOT_FILE}")
+    print(f"{os.path.getsize(DATA_FILE) / 1024:.0f} KB JSON, {os.path.getsize(SNAPSHOT_FILE) / 1024:.0f} KB snapshot, "
+          f"{runs} runs, query {query!r}\n")
+    print(f"{'path':<10}{'load (ms)':>12}{'first query (ms)':>20}{'results':>10}")
+
+    for mode in ("json", "snapshot"):
+        results = [run(mode, query) for _ in range(runs)]
+        load = statistics.median(r[0] for r in results) * 1000
+        first_query = statistics.median(r[1] for r in results) * 1000
+        print(f"{mode:<10}{load:>12.1f}{first_query:>20.1f}{results[0][2]:>10}")
+
+
+if __name__ == "__main__":
+    main()
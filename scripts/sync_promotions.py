@@ -1,13 +1,12 @@
 """
 Script to sync promotions data from API to local JSON file.
-Usage: python scripts/sync_promotions.py
+Usage: python scripts/sync_promotions.py [--full] [--pages DIR]
+  --pages DIR  also write the /view pages as static files (DIR/view/<id>.html, e.g. public)
 """
 import os
 import sys
 import json
-import uuid
 import logging
-from datetime import datetime
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -23,12 +22,19 @@ except ImportError:
     sys.exit(1)
 
 from api.promotions import process_promotions
-from src.utils.fetcher import login, fetch_promotions_data as fetch_promotions
+from src.utils.fetcher import login
+from src.search.engine import active_records, write_snapshot_file
+from src.bot.pages import write_static_pages
+from src.utils.sync import sync_promotions
 
 # Configuration
 DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/promotions.json")
+SNAPSHOT_FILE = os.path.join(os.path.dirname(DATA_FILE), "promotions.snapshot")
 
 def main():
+    # --full re-reads the whole feed (also detects promotions deleted on the server)
+    full = True if "--full" in sys.argv[1:] else None
+    pages_dir = sys.argv[sys.argv.index("--pages") + 1] if "--pages" in sys.argv[1:-1] else None
     logger.info("Starting promotion sync...")
     
     token = login()
@@ -36,24 +42,36 @@ def main():
         logger.error("Could not obtain access token. Aborting.")
         return
     
-    logger.info("Login successful. Fetching promotions...")
-    raw_promotions = fetch_promotions(token)
-    
-    if not raw_promotions:
-        logger.error("No promotions fetched. Aborting.")
+    logger.info("Login successful. Syncing promotions...")
+    try:
+        delta = sync_promotions(token, DATA_FILE, process_promotions, full=full)
+    except Exception as e:
+        logger.error(f"Sync failed: {str(e)}")
         return
     
-    logger.info(f"Fetched {len(raw_promotions)} promotions. Processing...")
-    processed_data = process_promotions(raw_promotions)
+    if delta["not_modified"]:
+        logger.info(f"{DATA_FILE} is up to date (upstream not modified)")
+    else:
+        logger.info(
+            f"{'Full' if delta['full'] else 'Delta'} sync of {DATA_FILE}: fetched {delta['fetched']}, "
+            f"{len(delta['added'])} added, {len(delta['changed'])} changed, {len(delta['removed'])} removed"
+        )
     
-    # Save to file
+    # Prebuilt index for fast cold starts (only rewritten when promotions.json changed)
     try:
-        os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(processed_data, f, ensure_ascii=False, indent=2)
-        logger.info(f"Successfully saved {len(processed_data)} promotions to {DATA_FILE}")
+        if write_snapshot_file(DATA_FILE, SNAPSHOT_FILE):
+            logger.info(f"Wrote search snapshot {SNAPSHOT_FILE}")
     except Exception as e:
-        logger.error(f"Failed to save file: {str(e)}")
+        logger.error(f"Failed to write search snapshot: {str(e)}")
+    
+    # Static /view pages, so opening a promotion does not start a Python function
+    if pages_dir:
+        try:
+            with open(DATA_FILE, "r", encoding="utf-8") as f:
+                written = write_static_pages(active_records(json.load(f)), pages_dir)
+            logger.info(f"Wrote {written} promotion pages to {pages_dir}")
+        except Exception as e:
+            logger.error(f"Failed to write promotion pages: {str(e)}")
 
 if __name__ == "__main__":
     main()
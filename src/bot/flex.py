@@ -0,0 +1,86 @@
+"""
+Flex Message bubbles for search results.
+A bubble depends only on the promotion, not on the query or page, so each one
+is built once per (promotion id, data version) and reused: a carousel for any
+page or repeated search is assembled from cached bubbles.
+"""
+from src.search.cache import LRUCache
+
+VIEW_URL = "https://rag-bot-chat.vercel.app/view/{}"
+# Enough for every active promotion; entries from older data versions age out
+BUBBLE_CACHE_SIZE = 2048
+
+bubble_cache = LRUCache(maxsize=BUBBLE_CACHE_SIZE)
+
+
+def build_bubble(promo) -> dict:
+    """Flex bubble dict for one promotion (PromoRecord or SearchHit)."""
+    # Clean up title
+    title = promo.title.split('\n')[-1].strip() if '\n' in promo.title else promo.title
+
+    # Get content
+    content = promo.content or promo.description
+    if len(content) > 200:
+        content = content[:197] + "..."
+
+    # Build attachment buttons (URLs were encoded when the record was loaded)
+    actions = []
+    for idx, (att, att_url) in enumerate(zip(promo.attachments, promo.attachment_uris), 1):
+        att_text = att.get('text', '').strip().rstrip('>').strip()
+
+        if att_text:
+            label = att_text[:20] if len(att_text) <= 20 else att_text[:17] + "..."
+        else:
+            filename = att_url.split('/')[-1].split('.')[0][:15]
+            label = filename if filename else f"ไฟล์ {idx}"
+
+        if att_url and att_url.startswith(('http://', 'https://')) and not att_url.endswith('#'):
+            actions.append({
+                "type": "button",
+                "style": "secondary",
+                "action": {"type": "uri", "label": label, "uri": att_url}
+            })
+
+    bubble = {
+        "type": "bubble",
+        "size": "mega",
+        "header": {
+            "type": "box",
+            "layout": "vertical",
+            "contents": [{"type": "text", "text": title, "weight": "bold", "size": "md", "wrap": True, "maxLines": 2}],
+            "backgroundColor": "#27ACB2"
+        },
+        "body": {
+            "type": "box",
+            "layout": "vertical",
+            "contents": [
+                {"type": "text", "text": content if content else "ไม่มีรายละเอียด", "size": "sm", "wrap": True, "color": "#666666"},
+                {"type": "text", "text": "👆 แตะเพื่อดูรายละเอียดเพิ่มเติม", "size": "xs", "color": "#27ACB2", "margin": "md"}
+            ],
+            "action": {"type": "uri", "uri": VIEW_URL.format(promo.id)}
+        }
+    }
+
+    if actions:
+        bubble["footer"] = {"type": "box", "layout": "vertical", "spacing": "sm", "contents": actions}
+    return bubble
+
+
+def cached_bubble(promo, version: int):
+    """
+    BubbleContainer for promo at data version, built on first use. The SDK
+    model is cached too, so sending a carousel does not parse the dict again.
+    Cached containers are shared - do not modify them.
+    """
+    key = (promo.id, version)
+    bubble = bubble_cache.get(key)
+    if bubble is None:
+        from linebot.models import BubbleContainer
+        bubble = BubbleContainer.new_from_json_dict(build_bubble(promo))
+        bubble_cache.put(key, bubble)
+    return bubble
+
+
+def carousel(promos, version: int):
+    from linebot.models import CarouselContainer
+    return CarouselContainer(contents=[cached_bubble(promo, version) for promo in promos])
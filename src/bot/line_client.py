@@ -0,0 +1,57 @@
+"""
+Non-blocking client for the LINE Messaging API reply endpoint.
+Replies go through one pooled httpx.AsyncClient per event loop (keep-alive,
+bounded timeouts), so a webhook waiting on LINE does not block other requests.
+Set LINE_API_BASE to point it at a local stub.
+"""
+import asyncio
+import os
+
+import httpx
+
+LINE_API_BASE = os.environ.get("LINE_API_BASE", "https://api.line.me").rstrip("/")
+REPLY_PATH = "/v2/bot/message/reply"
+TIMEOUT = httpx.Timeout(10, connect=5)
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+
+
+class LineApiError(Exception):
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"LINE API error {status_code}: {body[:200]}")
+        self.status_code = status_code
+
+
+class AsyncLineClient:
+    def __init__(self, access_token: str, base_url: str = LINE_API_BASE):
+        self.base_url = base_url
+        self.headers = {"Authorization": f"Bearer {access_token}"}
+        # event loop -> AsyncClient (httpx clients cannot be shared across loops)
+        self._clients = {}
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # Drop clients of loops that were closed without aclose() (e.g. one asyncio.run per call).
+            # Not a WeakKeyDictionary: a client's pooled connections keep a reference to their loop
+            self._clients = {other: c for other, c in self._clients.items() if not other.is_closed()}
+            client = httpx.AsyncClient(base_url=self.base_url, headers=self.headers, timeout=TIMEOUT, limits=LIMITS)
+            self._clients[loop] = client
+        return client
+
+    async def reply_message(self, reply_token: str, messages):
+        """Send one message or a list of linebot SendMessage objects (or dicts) as a reply."""
+        if not isinstance(messages, (list, tuple)):
+            messages = [messages]
+        payload = {
+            "replyToken": reply_token,
+            "messages": [m if isinstance(m, dict) else m.as_json_dict() for m in messages],
+        }
+        response = await self._client().post(REPLY_PATH, json=payload)
+        if response.status_code != 200:
+            raise LineApiError(response.status_code, response.text)
+
+    async def aclose(self):
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
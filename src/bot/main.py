@@ -1,23 +1,26 @@
 import os
 import sys
-from urllib.parse import quote, urlparse
-from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse
-from linebot import LineBotApi, WebhookHandler
-from linebot.exceptions import InvalidSignatureError
-from linebot.models import MessageEvent, TextMessage, TextSendMessage, FlexSendMessage, QuickReply, QuickReplyButton, MessageAction
-from dotenv import load_dotenv
 import re
+import asyncio
+from datetime import datetime
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.search.engine import SearchEngine
+from src.utils import startup
+from src.bot import flex, pages
+from src.bot.sessions import create_session_store
+
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse
+from dotenv import load_dotenv
+
+from src.utils.dates import duration_text, parse_datetime
 
 load_dotenv()
 
 app = FastAPI()
-search_engine = SearchEngine()
 
 # Line Config
 # Note: CHANNEL_ACCESS_TOKEN is required. 
@@ -25,20 +28,27 @@ search_engine = SearchEngine()
 LINE_CHANNEL_ACCESS_TOKEN = os.getenv("LINE_CHANNEL_ACCESS_TOKEN", "YOUR_ACCESS_TOKEN")
 LINE_CHANNEL_SECRET = os.getenv("LINE_CHANNEL_SECRET", "YOUR_CHANNEL_SECRET")
 
-line_bot_api = LineBotApi(LINE_CHANNEL_ACCESS_TOKEN)
-handler = WebhookHandler(LINE_CHANNEL_SECRET)
+# Heavy objects are created on first use (see src.utils.startup), so a cold
+# start only pays for FastAPI before it can answer; importing never touches the network
+def _create_search_engine():
+    from src.search.engine import SearchEngine
+    return SearchEngine()
 
-# Store user search sessions for pagination (with timestamps for cleanup)
-user_sessions = {}
-SESSION_TIMEOUT = 1800  # 30 minutes
+def _create_line_client():
+    from src.bot.line_client import AsyncLineClient
+    return AsyncLineClient(LINE_CHANNEL_ACCESS_TOKEN)
 
-import uuid
-import time
-from datetime import datetime
-try:
-    import httpx
-except ImportError:
-    httpx = None
+def _create_webhook_parser():
+    from linebot import WebhookParser
+    return WebhookParser(LINE_CHANNEL_SECRET)
+
+search_engine = startup.Lazy("search_engine", _create_search_engine)
+line_client = startup.Lazy("line_client", _create_line_client)
+parser = startup.Lazy("webhook_parser", _create_webhook_parser)
+
+# Search sessions for pagination (query + ranked ids, expire after SESSION_TIMEOUT).
+# SESSION_BACKEND=sqlite shares them between workers.
+user_sessions = create_session_store()
 
 @app.get("/")
 def root():
@@ -46,14 +56,19 @@ def root():
         "status": "ok", 
         "service": "Manual Knowledge Bot (Keyword Search)",
         "promotions_loaded": len(search_engine.promotions),
-        "data_file": str(search_engine.promotions[0].get("id") if search_engine.promotions else "empty")
+        "search_cache": search_engine.result_cache.stats(),
+        "sessions": user_sessions.stats(),
+        "data_file": str(search_engine.promotions[0].get("id") if search_engine.promotions else "empty"),
+        "startup_ms": startup.timings()
     }
 
-# Scraper Configuration
-VR_LOGIN_URL = "https://api.vrcomseven.com/users/web_login"
-VR_PROMOTIONS_URL = "https://api.vrcomseven.com/v1/promotions"
-VR_USERNAME = os.getenv("VR_USERNAME", "25622")
-VR_PASSWORD = os.getenv("VR_PASSWORD", "91544")
+@app.on_event("shutdown")
+async def shutdown():
+    fetcher = sys.modules.get("src.utils.fetcher")
+    if fetcher is not None:
+        await fetcher.close_async_client()
+    if line_client.created:
+        await line_client.aclose()
 
 # Simple cache for promotions
 _promo_cache = {"data": None, "timestamp": 0}
@@ -68,52 +83,28 @@ async def get_promotions():
     if _promo_cache["data"] and (now - _promo_cache["timestamp"] < CACHE_TTL):
         return {"success": True, "count": len(_promo_cache["data"]), "data": _promo_cache["data"], "cached": True}
     
-    if not httpx:
+    from src.utils import fetcher
+    if not fetcher.httpx:
         return {"success": False, "error": "httpx not installed"}
     
-    # Login
+    # Login (cached token, shared with the sync)
     try:
-        login_resp = httpx.post(
-            VR_LOGIN_URL,
-            json={"emp_code": VR_USERNAME, "pass": VR_PASSWORD, "device_uuid": str(uuid.uuid4()), "platform": "web"},
-            timeout=30
-        )
-        token_data = login_resp.json().get("data", {})
-        token = token_data.get("access_token")
+        token = await fetcher.token_manager.get_token_async()
         if not token:
             return {"success": False, "error": "Login failed"}
     except Exception as e:
         return {"success": False, "error": f"Login error: {str(e)}"}
     
-    # Fetch promotions
+    # Fetch promotions (all pages, on the shared pooled client)
     try:
-        promo_resp = httpx.get(
-            f"{VR_PROMOTIONS_URL}?perpage=200&sort_by=updated_at&sort_direction=desc&business_units=Apple",
-            headers={"Authorization": f"Bearer {token}"},
-            timeout=60
-        )
-        raw = promo_resp.json().get("data", [])
+        raw = await fetcher.fetch_all_promotions(token)
     except Exception as e:
         return {"success": False, "error": f"Fetch error: {str(e)}"}
     
     # Process promotions
     results = []
     for promo in raw:
-        duration = ""
-        try:
-            display_to = promo.get("display_to")
-            if display_to:
-                end_date = datetime.strptime(display_to.split()[0], "%Y-%m-%d")
-                days_left = (end_date - datetime.now()).days
-                if days_left > 0:
-                    duration = f"เหลือเวลาอีก {days_left} วัน"
-                elif days_left == 0:
-                    duration = "วันนี้วันสุดท้าย"
-                else:
-                    duration = "หมดอายุแล้ว"
-        except Exception as e:
-            print(f"Error parsing date: {e}")
-            pass
+        duration = duration_text(parse_datetime(promo.get("display_to")))
         
         attachments = [{"text": a.get("title", "ดาวน์โหลด"), "url": a.get("uri", "")} for a in (promo.get("attachments") or [])]
         
@@ -137,76 +128,42 @@ async def callback(request: Request):
     body = await request.body()
     body_decode = body.decode("utf-8")
 
+    # Signature check and event parsing are cheap - done on the event loop
+    from linebot.exceptions import InvalidSignatureError
+    from linebot.models import MessageEvent, TextMessage
     try:
-        handler.handle(body_decode, signature)
+        events = parser.parse(body_decode, signature)
     except InvalidSignatureError:
         raise HTTPException(status_code=400, detail="Invalid signature")
 
+    messages = [e for e in events if isinstance(e, MessageEvent) and isinstance(e.message, TextMessage)]
+    await asyncio.gather(*(reply_to(event) for event in messages))
+
+    startup.mark("first_webhook")
     return "OK"
 
+async def reply_to(event):
+    # Search runs in the threadpool; the reply is sent without blocking the loop
+    reply_msg = await run_in_threadpool(build_reply, event.source.user_id, event.message.text)
+    try:
+        await line_client.reply_message(event.reply_token, reply_msg)
+    except Exception as e:
+        print(f"Error sending reply: {e}")
+
 # View promotion details (no login required)
 @app.get("/view/{promo_id}", response_class=HTMLResponse)
 def view_promotion(promo_id: int):
-    promo = search_engine.get_by_id(promo_id)
+    promo, version = search_engine.get_by_id(promo_id, with_version=True)
     if not promo:
-        return HTMLResponse("<h1>ไม่พบโปรโมชั่น</h1>", status_code=404)
-    
-    title = promo.get('title', 'โปรโมชั่น')
-    content = promo.get('content', '') or promo.get('description', '')
-    attachments = promo.get('attachments', [])
-    
-    # Build attachments HTML
-    att_html = ""
-    if attachments:
-        att_html = "<h3>📎 ไฟล์แนบ</h3><ul>"
-        for att in attachments:
-            att_text = att.get('text', 'ไฟล์').rstrip('>').strip()
-            att_url = att.get('url', '')
-            if att_url:
-                att_html += f'<li><a href="{att_url}" target="_blank">{att_text}</a></li>'
-        att_html += "</ul>"
-    
-    html = f'''<!DOCTYPE html>
-<html lang="th">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <style>
-        body {{ font-family: -apple-system, BlinkMacSystemFont, sans-serif; padding: 20px; max-width: 800px; margin: 0 auto; background: #f5f5f5; }}
-        .card {{ background: white; border-radius: 12px; padding: 20px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
-        h1 {{ color: #27ACB2; font-size: 1.4em; }}
-        h3 {{ color: #333; margin-top: 20px; }}
-        .content {{ white-space: pre-wrap; line-height: 1.6; color: #444; }}
-        ul {{ padding-left: 20px; }}
-        li {{ margin: 8px 0; }}
-        a {{ color: #27ACB2; text-decoration: none; }}
-        a:hover {{ text-decoration: underline; }}
-    </style>
-</head>
-<body>
-    <div class="card">
-        <h1>{title}</h1>
-        <div class="content">{content}</div>
-        {att_html}
-    </div>
-</body>
-</html>'''
-    return HTMLResponse(html)
+        return HTMLResponse(pages.NOT_FOUND_PAGE, status_code=404)
+    return HTMLResponse(pages.cached_page(promo, version))
 
-@handler.add(MessageEvent, message=TextMessage)
-def handle_message(event):
-    user_id = event.source.user_id
-    user_msg = event.message.text.strip()
+def build_reply(user_id: str, text: str):
+    """Search and build the reply message for one text message (blocking - run it off the event loop)."""
+    from linebot.models import TextSendMessage, FlexSendMessage, QuickReply, QuickReplyButton, MessageAction
+    user_msg = text.strip()
     print(f"Received: {user_msg}")
     
-    # Cleanup old sessions (older than 30 minutes)
-    current_time = time.time()
-    expired_users = [uid for uid, data in user_sessions.items() 
-                     if current_time - data.get('timestamp', 0) > SESSION_TIMEOUT]
-    for uid in expired_users:
-        del user_sessions[uid]
-    
     # Help command
     help_commands = ['ช่วยเหลือ', 'วิธีใช้', 'help', '?']
     if user_msg.lower() in help_commands:
@@ -235,124 +192,44 @@ def handle_message(event):
                 QuickReplyButton(action=MessageAction(label="Incentive", text="incentive")),
             ])
         )
-        line_bot_api.reply_message(event.reply_token, reply_msg)
-        return
+        return reply_msg
     
     # Check for page navigation command (e.g., "หน้า 2", "หน้า2")
     page_match = re.match(r'^หน้า\s*(\d+)$', user_msg)
     
     if page_match:
         page_num = int(page_match.group(1))
-        # Get cached results from session
-        if user_id in user_sessions and user_sessions[user_id].get('results'):
-            results = user_sessions[user_id]['results']
-            query = user_sessions[user_id].get('query', 'ค้นหา')
-        else:
+        session = user_sessions.get(user_id)
+        if not session or not session.total:
             reply_msg = TextSendMessage(text="ไม่มีผลการค้นหาก่อนหน้า กรุณาค้นหาใหม่")
-            line_bot_api.reply_message(event.reply_token, reply_msg)
-            return
+            return reply_msg
+        if user_sessions.local and session.version != search_engine.data_version:
+            # Data changed since the search - rank again so the page matches the current data
+            session = search_session(user_id, session.query)
     else:
         # New search
         page_num = 1
-        
-        # Check for special commands
-        if user_msg == "ล่าสุด":
-            results = search_engine.get_latest(n=50)  # Get more for pagination
-            query = "ล่าสุด"
-        else:
-            results = search_engine.search(user_msg)
-            query = user_msg
-        
-        # Store in session for pagination (with timestamp)
-        user_sessions[user_id] = {'results': results, 'query': query, 'timestamp': current_time}
+        session = search_session(user_id, user_msg)
+    
+    # Pagination
+    per_page = 12
+    start_idx = (page_num - 1) * per_page
+    # A session from another worker is served from its ids; ones no longer live are skipped
+    total = session.total
+    page_results, version = search_engine.get_by_ids(session.ids[start_idx:start_idx + per_page])
     
-    if not results:
+    if not total:
         reply_msg = TextSendMessage(text=f"ไม่พบโปรโมชั่นที่เกี่ยวกับ '{user_msg}' ครับ\nลองคำอื่น หรือพิมพ์ 'ล่าสุด' เพื่อดูโปรใหม่ๆ")
     else:
         try:
-            # Pagination
-            per_page = 12
-            total_pages = (len(results) + per_page - 1) // per_page
-            start_idx = (page_num - 1) * per_page
-            end_idx = start_idx + per_page
-            page_results = results[start_idx:end_idx]
+            total_pages = (total + per_page - 1) // per_page
             
             if not page_results:
                 reply_msg = TextSendMessage(text=f"ไม่มีหน้า {page_num}")
-                line_bot_api.reply_message(event.reply_token, reply_msg)
-                return
+                return reply_msg
             
-            # Build Flex Message Carousel
-            bubbles = []
-            for promo in page_results:
-                # Clean up title
-                title = promo['title'].split('\n')[-1].strip() if '\n' in promo['title'] else promo['title']
-                
-                # Get content
-                content = promo.get('content', '') or promo.get('description', '')
-                if len(content) > 200:
-                    content = content[:197] + "..."
-                
-                promo_id = promo.get('id', 0)
-                attachments = promo.get('attachments', [])
-                
-                # Build attachment buttons
-                actions = []
-                for idx, att in enumerate(attachments, 1):
-                    att_url = att.get('url', '')
-                    
-                    # URL encode Thai characters
-                    if att_url:
-                        try:
-                            parsed = urlparse(att_url)
-                            encoded_path = quote(parsed.path, safe='/')
-                            att_url = f"{parsed.scheme}://{parsed.netloc}{encoded_path}"
-                        except:
-                            pass
-                    
-                    att_text = att.get('text', '').strip().rstrip('>').strip()
-                    
-                    if att_text:
-                        label = att_text[:20] if len(att_text) <= 20 else att_text[:17] + "..."
-                    else:
-                        filename = att_url.split('/')[-1].split('.')[0][:15]
-                        label = filename if filename else f"ไฟล์ {idx}"
-                    
-                    if att_url and att_url.startswith(('http://', 'https://')) and not att_url.endswith('#'):
-                        actions.append({
-                            "type": "button",
-                            "style": "secondary",
-                            "action": {"type": "uri", "label": label, "uri": att_url}
-                        })
-                
-                # Build bubble
-                bubble = {
-                    "type": "bubble",
-                    "size": "mega",
-                    "header": {
-                        "type": "box",
-                        "layout": "vertical",
-                        "contents": [{"type": "text", "text": title, "weight": "bold", "size": "md", "wrap": True, "maxLines": 2}],
-                        "backgroundColor": "#27ACB2"
-                    },
-                    "body": {
-                        "type": "box",
-                        "layout": "vertical",
-                        "contents": [
-                            {"type": "text", "text": content if content else "ไม่มีรายละเอียด", "size": "sm", "wrap": True, "color": "#666666"},
-                            {"type": "text", "text": "👆 แตะเพื่อดูรายละเอียดเพิ่มเติม", "size": "xs", "color": "#27ACB2", "margin": "md"}
-                        ],
-                        "action": {"type": "uri", "uri": f"https://rag-bot-chat.vercel.app/view/{promo_id}"}
-                    }
-                }
-                
-                if actions:
-                    bubble["footer"] = {"type": "box", "layout": "vertical", "spacing": "sm", "contents": actions}
-                
-                bubbles.append(bubble)
-            
-            # Create carousel
-            flex_content = {"type": "carousel", "contents": bubbles}
+            # Carousel from per-promotion bubbles, built once per data version
+            flex_content = flex.carousel(page_results, version)
             
             # Build Quick Reply buttons for pagination
             quick_reply_items = []
@@ -364,7 +241,7 @@ def handle_message(event):
                         )
             
             # Alt text with pagination info
-            alt_text = f"พบ {len(results)} รายการ (หน้า {page_num}/{total_pages})"
+            alt_text = f"พบ {total} รายการ (หน้า {page_num}/{total_pages})"
             
             if quick_reply_items:
                 reply_msg = FlexSendMessage(
@@ -377,7 +254,21 @@ def handle_message(event):
             
         except Exception as e:
             print(f"Error building Flex: {e}")
-            reply_msg = TextSendMessage(text=f"พบ {len(results)} รายการ แต่ไม่สามารถแสดง Card ได้")
+            reply_msg = TextSendMessage(text=f"พบ {total} รายการ แต่ไม่สามารถแสดง Card ได้")
+
+    return reply_msg
 
-    line_bot_api.reply_message(event.reply_token, reply_msg)
+def search_session(user_id: str, query: str):
+    """Run query and store its ranked result ids as the user's session."""
+    if query == "ล่าสุด":
+        latest, version = search_engine.get_latest(n=50, with_version=True)  # Get more for pagination
+        ids = [promo.id for promo in latest]
+    else:
+        ids, version = search_engine.search_ids(query)
+    return user_sessions.set(user_id, query, version, ids)
 
+startup.mark("imports")
+if startup.STARTUP_MODE == "eager":
+    search_engine.get()
+    line_client.get()
+    parser.get()
@@ -0,0 +1,99 @@
+"""
+HTML detail pages for /view/{promo_id} (linked from every carousel bubble).
+A page depends only on the promotion, so it is rendered once per
+(id, data version) into a bounded LRU cache. The sync step also writes the
+pages out as static files (public/view/<id>.html); on Vercel those are served
+at /view/<id> (cleanUrls) before any rewrite, so only promotions newer than
+the deployment reach Python.
+"""
+import os
+from html import escape
+
+from src.search.cache import LRUCache
+
+PAGE_CACHE_SIZE = 512
+
+page_cache = LRUCache(maxsize=PAGE_CACHE_SIZE)
+
+NOT_FOUND_PAGE = "<h1>ไม่พบโปรโมชั่น</h1>"
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="th">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, sans-serif; padding: 20px; max-width: 800px; margin: 0 auto; background: #f5f5f5; }}
+        .card {{ background: white; border-radius: 12px; padding: 20px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
+        h1 {{ color: #27ACB2; font-size: 1.4em; }}
+        h3 {{ color: #333; margin-top: 20px; }}
+        .content {{ white-space: pre-wrap; line-height: 1.6; color: #444; }}
+        ul {{ padding-left: 20px; }}
+        li {{ margin: 8px 0; }}
+        a {{ color: #27ACB2; text-decoration: none; }}
+        a:hover {{ text-decoration: underline; }}
+    </style>
+</head>
+<body>
+    <div class="card">
+        <h1>{title}</h1>
+        <div class="content">{content}</div>
+        {att_html}
+    </div>
+</body>
+</html>'''
+
+
+def render_page(promo) -> str:
+    """Detail page for one promotion; every field from the feed is escaped."""
+    title = promo.get('title') or 'โปรโมชั่น'
+    content = promo.get('content', '') or promo.get('description', '')
+    attachments = promo.get('attachments', [])
+
+    # Build attachments HTML
+    att_html = ""
+    if attachments:
+        items = []
+        for att in attachments:
+            att_text = att.get('text', 'ไฟล์').rstrip('>').strip()
+            att_url = att.get('url', '')
+            if att_url:
+                items.append(f'<li><a href="{escape(att_url)}" target="_blank" rel="noopener">{escape(att_text)}</a></li>')
+        att_html = "<h3>📎 ไฟล์แนบ</h3><ul>" + "".join(items) + "</ul>"
+
+    return PAGE_TEMPLATE.format(title=escape(title), content=escape(content), att_html=att_html)
+
+
+def cached_page(promo, version: int) -> str:
+    key = (promo.id, version)
+    page = page_cache.get(key)
+    if page is None:
+        page = render_page(promo)
+        page_cache.put(key, page)
+    return page
+
+
+def write_static_pages(promotions, out_dir) -> int:
+    """
+    Write out_dir/view/<id>.html for every promotion and delete pages of
+    promotions no longer in the list. Returns the number of pages written.
+    """
+    view_dir = os.path.join(out_dir, "view")
+    os.makedirs(view_dir, exist_ok=True)
+    live = set()
+    for promo in promotions:
+        if promo.id is None:
+            continue
+        name = f"{promo.id}.html"
+        path = os.path.join(view_dir, name)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(render_page(promo))
+        os.replace(tmp, path)
+        live.add(name)
+
+    for name in os.listdir(view_dir):
+        if name.endswith(".html") and name not in live:
+            os.remove(os.path.join(view_dir, name))
+    return len(live)
@@ -0,0 +1,201 @@
+"""
+Search sessions for LINE pagination ("หน้า 2").
+A session keeps only the query, the data version it was searched at and the
+ranked promotion ids (an int array), so any page can be served without
+searching again. Sessions expire SESSION_TIMEOUT after the search, and a hard
+cap evicts the least recently used session.
+
+Two backends, picked with SESSION_BACKEND:
+- "memory" (default): MemorySessionStore, per process. Expiry pops from the
+  front of a queue ordered by expiry time instead of scanning every user.
+- "sqlite": SQLiteSessionStore, a SQLite file in WAL mode (SESSION_DB) shared
+  by every worker on the host, so a follow-up page can go to any worker.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict, deque
+
+SESSION_TIMEOUT = 1800  # 30 minutes
+MAX_SESSIONS = 10000
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")
+SESSION_DB = os.environ.get("SESSION_DB") or os.path.join(tempfile.gettempdir(), "line_sessions.sqlite3")
+# The shared store deletes expired sessions in one statement at most this often
+CLEANUP_INTERVAL = 60
+
+
+class Session:
+    __slots__ = ('query', 'version', 'ids', 'expires_at')
+
+    def __init__(self, query: str, version: int, ids, expires_at: float):
+        self.query = query
+        self.version = version
+        self.ids = ids if isinstance(ids, array) else array('q', ids)
+        self.expires_at = expires_at
+
+    @property
+    def total(self) -> int:
+        return len(self.ids)
+
+
+class SessionStore(ABC):
+    """
+    Session backend interface. get() returns the live Session for a user or
+    None; set() stores a new one; stats() reports counters for the status page.
+    """
+    # Whether sessions always come from this process. Data versions are per
+    # process, so only a local store can compare them with the engine's.
+    local = True
+
+    @abstractmethod
+    def get(self, user_id: str, now: float = None):
+        ...
+
+    @abstractmethod
+    def set(self, user_id: str, query: str, version: int, ids, now: float = None) -> Session:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, ttl: float = SESSION_TIMEOUT, maxsize: int = MAX_SESSIONS):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # user_id -> Session, least recently used first
+        self._sessions = OrderedDict()
+        # (expires_at, user_id) in expiry order - the TTL is fixed, so appends stay sorted.
+        # Entries for sessions replaced since are skipped when they reach the front.
+        self._expiry = deque()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, user_id: str, now: float = None):
+        """Live session for user_id, None if there is none or it expired."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(user_id)
+            if session is not None:
+                self._sessions.move_to_end(user_id)
+            return session
+
+    def set(self, user_id: str, query: str, version: int, ids, now: float = None) -> Session:
+        now = time.time() if now is None else now
+        session = Session(query, version, ids, now + self.ttl)
+        with self._lock:
+            self._expire(now)
+            self._sessions[user_id] = session
+            self._sessions.move_to_end(user_id)
+            self._expiry.append((session.expires_at, user_id))
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            # Replaced sessions leave stale queue entries; drop them if they pile up
+            if len(self._expiry) > 2 * len(self._sessions) + 64:
+                self._expiry = deque(sorted((s.expires_at, uid) for uid, s in self._sessions.items()))
+        return session
+
+    def _expire(self, now: float):
+        expiry = self._expiry
+        while expiry and expiry[0][0] < now:
+            expires_at, user_id = expiry.popleft()
+            session = self._sessions.get(user_id)
+            if session is not None and session.expires_at == expires_at:
+                del self._sessions[user_id]
+                self.expirations += 1
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "size": len(self._sessions), "maxsize": self.maxsize,
+                "evictions": self.evictions, "expirations": self.expirations}
+
+
+class SQLiteSessionStore(SessionStore):
+    local = False
+
+    def __init__(self, path: str = SESSION_DB, ttl: float = SESSION_TIMEOUT, maxsize: int = MAX_SESSIONS):
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # One connection per thread (replies are built in the threadpool)
+        self._local = threading.local()
+        self._last_cleanup = 0.0
+        self.evictions = 0
+        self.expirations = 0
+        with self._connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS sessions (
+                user_id TEXT PRIMARY KEY, query TEXT NOT NULL, version INTEGER NOT NULL,
+                ids BLOB NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)""")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_used_at ON sessions (used_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, user_id: str, now: float = None):
+        now = time.time() if now is None else now
+        self._cleanup(now)
+        with self._connect() as db:
+            row = db.execute("SELECT query, version, ids, expires_at FROM sessions "
+                             "WHERE user_id = ? AND expires_at >= ?", (user_id, now)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE sessions SET used_at = ? WHERE user_id = ?", (now, user_id))
+        query, version, blob, expires_at = row
+        ids = array('q')
+        ids.frombytes(blob)
+        return Session(query, version, ids, expires_at)
+
+    def set(self, user_id: str, query: str, version: int, ids, now: float = None) -> Session:
+        now = time.time() if now is None else now
+        session = Session(query, version, ids, now + self.ttl)
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                       (user_id, query, version, session.ids.tobytes(), session.expires_at, now))
+        self._cleanup(now)
+        return session
+
+    def _cleanup(self, now: float):
+        """Delete expired sessions and trim to maxsize, in batches every CLEANUP_INTERVAL."""
+        if now - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        with self._connect() as db:
+            self.expirations += db.execute("DELETE FROM sessions WHERE expires_at < ?", (now,)).rowcount
+            excess = db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.maxsize
+            if excess > 0:
+                self.evictions += db.execute(
+                    "DELETE FROM sessions WHERE user_id IN "
+                    "(SELECT user_id FROM sessions ORDER BY used_at LIMIT ?)", (excess,)).rowcount
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self) -> dict:
+        # Counters are this worker's; size is the shared table
+        return {"backend": "sqlite", "size": len(self), "maxsize": self.maxsize,
+                "evictions": self.evictions, "expirations": self.expirations}
+
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend != "memory":
+        print(f"Unknown SESSION_BACKEND {backend!r}, using memory")
+    return MemorySessionStore()
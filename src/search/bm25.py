@@ -0,0 +1,148 @@
+"""
+BM25F ranking for SearchEngine.
+Field lengths, their averages and field weights are precomputed when the
+index is built; a query is scored as NumPy operations over the
+(candidate document x field) term-frequency matrix of each query term.
+"""
+import math
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+
+# Per-field weights, same proportions as the original additive scores
+# (title 100, promotion_type 50, keyword 25, description 20, content 10)
+FIELDS = ('title', 'promotion_type', 'keywords', 'description', 'content')
+FIELD_WEIGHTS = np.array([5.0, 2.5, 1.25, 1.0, 0.5])
+
+# Shortest multi-word term matched as a substring of each field - short substrings
+# are too noisy in long text. Single-word terms take their tf from the token
+# postings instead (whole words only, except for partial-word title hits)
+MIN_TERM_LENGTH = {'title': 2, 'promotion_type': 2, 'keywords': 2, 'description': 5, 'content': 6}
+
+# Title hit inside a longer word counts less than a whole-word hit (was 70 vs 100)
+PARTIAL_WORD_TF = 0.7
+# Fuzzy title hit (was 40 vs 100)
+FUZZY_TF = 0.4
+# Only terms longer than this get a fuzzy fallback
+FUZZY_MIN_TERM_LENGTH = 5
+
+
+class BM25Scorer:
+    def __init__(self, index):
+        self.index = index
+        self.refresh()
+
+    def refresh(self):
+        """Recompute document statistics after the index changed."""
+        records = self.index.records
+        lengths = np.zeros((len(records), len(FIELDS)))
+        for doc, record in enumerate(records):
+            if record is None:
+                continue
+            lengths[doc] = (
+                len(record.title_lower),
+                len(record.type_lower),
+                len(record.keyword_set),
+                len(record.description_lower),
+                len(record.content_lower),
+            )
+        # Removed documents keep a zero row; N and averages only count live ones
+        self.size = self.index.live
+        self.lengths = lengths
+        avg = lengths.sum(axis=0) / self.size if self.size else np.ones(len(FIELDS))
+        self.avg_lengths = np.where(avg > 0, avg, 1.0)
+
+    def _term_frequencies(self, variants, fuzzy_term=None, memo=None):
+        """
+        Collect term frequencies of one query term (all its normalized synonym variants).
+        Returns ({doc: tf row}, {doc: set of matched variants}).
+        memo, a dict shared by the queries of one batch, keeps the exact matches
+        per variant set: terms whose synonyms expand the same are looked up once.
+        """
+        index = self.index
+        key = frozenset(variants)
+        cached = memo.get(key) if memo is not None else None
+        # Fuzzy matches below only add new documents - shallow copies keep the memo intact
+        rows, matched = (dict(cached[0]), dict(cached[1])) if cached is not None else ({}, {})
+
+        def add(doc, field, tf, variant):
+            row = rows.get(doc)
+            if row is None:
+                row = rows[doc] = [0.0] * len(FIELDS)
+            row[field] += tf
+            matched.setdefault(doc, set()).add(variant)
+
+        if cached is None:
+            for variant in variants:
+                term_len = len(variant)
+                # Single-token variants can use the token postings (whole-word hits)
+                single_token = index.is_token(variant)
+                for field_no, field in enumerate(FIELDS):
+                    if field == 'keywords':
+                        if term_len >= MIN_TERM_LENGTH[field]:
+                            for doc in index.lookup_keyword(variant):
+                                add(doc, field_no, 1.0, variant)
+                        continue
+
+                    whole = index.lookup_token(field, variant) if single_token else {}
+
+                    if single_token and field != 'title' or term_len < MIN_TERM_LENGTH[field]:
+                        # Token postings already hold the tf of whole words; short
+                        # terms match whole words only
+                        for doc, count in whole.items():
+                            add(doc, field_no, count, variant)
+                        continue
+
+                    # Multi-word variants (and partial-word title hits) are counted in the text
+                    for doc in index.lookup(field, variant):
+                        tf = index.text(field, doc).count(variant)
+                        if single_token:
+                            words = whole.get(doc, 0)
+                            tf = words + PARTIAL_WORD_TF * (tf - words)
+                        add(doc, field_no, tf, variant)
+            if memo is not None:
+                memo[key] = (dict(rows), dict(matched))
+
+        # Fuzzy fallback on title words for documents this term did not match
+        if fuzzy_term and len(fuzzy_term) >= FUZZY_MIN_TERM_LENGTH:
+            for doc, word in index.fuzzy.match(fuzzy_term, exclude=rows).items():
+                add(doc, 0, FUZZY_TF, word)
+
+        return rows, matched
+
+    def score(self, term_groups, memo=None):
+        """
+        Score documents for a query given as a list of (variants, fuzzy_term).
+        Returns ({doc: score}, {doc: set of matched strings}).
+        """
+        all_docs = []
+        all_scores = []
+        matched = {}
+
+        for variants, fuzzy_term in term_groups:
+            rows, group_matched = self._term_frequencies(variants, fuzzy_term, memo)
+            if not rows:
+                continue
+
+            docs = np.fromiter(rows.keys(), dtype=np.int64, count=len(rows))
+            tf = np.array(list(rows.values()))
+
+            # BM25F: length-normalized, weighted tf summed over fields, then saturated
+            norm = 1.0 - B + B * self.lengths[docs] / self.avg_lengths
+            pseudo_tf = (tf * FIELD_WEIGHTS / norm).sum(axis=1)
+            df = len(docs)
+            idf = math.log(1.0 + (self.size - df + 0.5) / (df + 0.5))
+            all_docs.append(docs)
+            all_scores.append(idf * pseudo_tf * (K1 + 1.0) / (pseudo_tf + K1))
+
+            for doc, terms in group_matched.items():
+                matched.setdefault(doc, set()).update(terms)
+
+        if not all_docs:
+            return {}, matched
+
+        docs, inverse = np.unique(np.concatenate(all_docs), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(all_scores))
+        return dict(zip(docs.tolist(), totals.tolist())), matched
@@ -1,12 +1,37 @@
+import functools
+import hashlib
+import heapq
+import itertools
 import json
 import os
 import re
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
+from src.search import bm25
+from src.search.cache import LRUCache
+from src.search.facets import from_bits, to_bits
+from src.search.highlight import Highlighter
+from src.search.records import PromoRecord, SearchHit
+from src.search.snapshot import SearchSnapshot, load_snapshot, save_snapshot, snapshot_matches, source_digest
+from src.utils import startup
+from src.utils.thai_text import THAI_WORDS, get_segmenter, normalize
+
 # Get project root (2 levels up from src/search/engine.py)
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 DATA_FILE = PROJECT_ROOT / "data" / "promotions.json"
+# Prebuilt binary snapshot of DATA_FILE written at sync time (None disables it)
+SNAPSHOT_FILE = DATA_FILE.with_suffix(".snapshot")
+
+# Number of distinct queries kept in SearchEngine.result_cache
+RESULT_CACHE_SIZE = 256
+
+# Seconds between background refresh checks (0 disables the refresh thread)
+REFRESH_INTERVAL = float(os.environ.get("SEARCH_REFRESH_INTERVAL", "300"))
+# Data file older than this (seconds) is fetched again from the API
+DATA_MAX_AGE = float(os.environ.get("SEARCH_DATA_MAX_AGE", "3600"))
 
 # Stop words - คำที่ไม่ควร match
 STOP_WORDS = {
@@ -174,64 +199,257 @@ SYNONYMS = {
     'dtac': ['dtac', 'ดีแทค'],
 }
 
+# Normalized forms (tone marks etc. folded) used when matching against the index
+NORMALIZED_STOP_WORDS = {normalize(word) for word in STOP_WORDS}
+NORMALIZED_SYNONYMS = {}
+for _key, _variants in SYNONYMS.items():
+    NORMALIZED_SYNONYMS.setdefault(normalize(_key), set()).update(normalize(v) for v in _variants)
+
+
+def index_config_digest() -> bytes:
+    """
+    sha1 of the settings a saved snapshot was built with (segmenter words, stop
+    words, synonyms, field weights), so a snapshot from another config is rebuilt.
+    """
+    config = {
+        'thai_words': sorted(THAI_WORDS),
+        'stop_words': sorted(NORMALIZED_STOP_WORDS),
+        'synonyms': {key: sorted(variants) for key, variants in sorted(NORMALIZED_SYNONYMS.items())},
+        'field_weights': dict(zip(bm25.FIELDS, bm25.FIELD_WEIGHTS.tolist())),
+        'min_term_length': bm25.MIN_TERM_LENGTH,
+        'bm25': [bm25.K1, bm25.B],
+    }
+    return hashlib.sha1(json.dumps(config, ensure_ascii=False, sort_keys=True).encode()).digest()
+
+@functools.lru_cache(maxsize=4)
+def _old_years_pattern(current_year: int):
+    """Regex matching any year before current_year (2020+ and Thai 2563+)."""
+    years = [str(y) for y in range(2020, current_year)]
+    years += [str(y) for y in range(2563, current_year + 543)]
+    return re.compile('|'.join(years)) if years else re.compile(r'(?!)')
+
 class SearchEngine:
-    def __init__(self):
-        self.promotions = []
+    def __init__(self, refresh_interval: float = None):
+        """
+        Load promotions from DATA_FILE without touching the network.
+        Fetching fresh data runs on a background thread every refresh_interval
+        seconds (REFRESH_INTERVAL by default, 0 disables it).
+        """
+        # Current SearchSnapshot - replaced as a whole, never modified after publishing
+        self.snapshot = SearchSnapshot.build([], 0)
+        # (normalized query, snapshot version) -> scored results, including empty ones
+        self.result_cache = LRUCache(RESULT_CACHE_SIZE)
+        # Serializes writers (reload, expiry); searches never take it
+        self._write_lock = threading.Lock()
+        self._loaded_mtime = None
+        # Year the published snapshot's old-year filter ran in (see _save_snapshot)
+        self._snapshot_year = None
+        self._stop_refresh = threading.Event()
+        self._refresh_thread = None
         self.load_data()
+        
+        if refresh_interval is None:
+            refresh_interval = REFRESH_INTERVAL
+        if refresh_interval > 0:
+            self.start_refresh(refresh_interval)
+    
+    @property
+    def promotions(self):
+        return self.snapshot.promotions
+    
+    @property
+    def index(self):
+        return self.snapshot.index
     
-    def is_expired(self, promo):
-        """Check if promotion is expired based on duration field or old year in title/description."""
-        duration = promo.get('duration', '')
-        title = promo.get('title', '')
-        description = promo.get('description', '')
+    @property
+    def data_version(self):
+        return self.snapshot.version
+    
+    @staticmethod
+    def is_expired(record: PromoRecord, now: float = None):
+        """Check if promotion is expired based on end_date, duration text or old year in title/description."""
+        now = time.time() if now is None else now
         
-        # Check if marked as expired
-        if 'หมดอายุ' in duration:
+        # Past its end date
+        if record.expires_at is not None:
+            if record.expires_at <= now:
+                return True
+        # No end date - fall back to the text marked at sync time
+        elif 'หมดอายุ' in record._duration:
             return True
         
-        # Check for old years in title OR description (dynamically calculated)
-        current_year = datetime.now().year
-        current_thai_year = current_year + 543
-        old_years_christian = [str(y) for y in range(2020, current_year)]
-        old_years_thai = [str(y) for y in range(2563, current_thai_year)]
+        # Check for old years in title OR description
+        old_years = _old_years_pattern(datetime.fromtimestamp(now).year)
+        return bool(old_years.search(record.title) or old_years.search(record.description))
+
+    def _publish(self, snapshot: SearchSnapshot):
+        """Make snapshot the one searches see (one reference assignment)."""
+        self.snapshot = snapshot
+        self.result_cache.clear()
+
+    def load_data(self):
+        """
+        Publish a new snapshot of DATA_FILE: the prebuilt SNAPSHOT_FILE when it was
+        built from the same file, otherwise parse and index the JSON.
+        """
+        if not os.path.exists(DATA_FILE):
+            print("Warning: promotions.json not found.")
+            return
         
-        text_to_check = title + ' ' + description
-        for year in old_years_christian + old_years_thai:
-            if year in text_to_check:
-                return True
+        try:
+            mtime = os.path.getmtime(DATA_FILE)
+            with open(DATA_FILE, "rb") as f:
+                raw = f.read()
+            
+            now = time.time()
+            year = datetime.fromtimestamp(now).year
+            started = time.perf_counter()
+            snapshot = load_snapshot(SNAPSHOT_FILE, source_digest(raw), year, index_config_digest()) if SNAPSHOT_FILE else None
+            if snapshot is not None:
+                startup.record("snapshot_load", time.perf_counter() - started)
+                message = f"Loaded {len(snapshot.promotions)} active promotions from {SNAPSHOT_FILE.name}"
+            else:
+                with startup.phase("data_load"):
+                    all_promos = json.loads(raw)
+                    promotions = active_records(all_promos, now)
+                with startup.phase("index_build"):
+                    snapshot = SearchSnapshot.build(promotions, 0, NORMALIZED_STOP_WORDS)
+                message = (f"Loaded {len(promotions)} active promotions "
+                           f"(filtered {len(all_promos) - len(promotions)} expired)")
+            
+            with self._write_lock:
+                snapshot.version = self.snapshot.version + 1
+                self._publish(snapshot)
+                self._loaded_mtime = mtime
+                self._snapshot_year = year
+            print(message)
+        except Exception as e:
+            print(f"Error loading data: {e}")
+
+    def expire_due(self, now: float = None) -> int:
+        """
+        Publish a snapshot without the promotions whose end_date has passed.
+        Runs on the refresh thread; until then searches hide them (SearchSnapshot.expired).
+        """
+        now = time.time() if now is None else now
+        next_expiry = self.snapshot.next_expiry()
+        if next_expiry is None or next_expiry > now:
+            return 0
         
-        return False
+        # Another writer is busy - its snapshot is filtered by end_date anyway
+        if not self._write_lock.acquire(blocking=False):
+            return 0
+        try:
+            current = self.snapshot
+            snapshot = current.expire(now, current.version + 1)
+            if snapshot is None:
+                return 0
+            self._publish(snapshot)
+        finally:
+            self._write_lock.release()
+        
+        expired = len(current.promotions) - len(snapshot.promotions)
+        print(f"Expired {expired} promotions ({len(snapshot.promotions)} active)")
+        return expired
 
-    def load_data(self):
-        # Check file age and update if needed
-        self.check_and_update_data()
+    def apply_delta(self, upserts: list, removed_ids) -> int:
+        """
+        Publish a snapshot with synced promotions (dicts from promotions.json) added
+        or replaced and removed_ids dropped, without rebuilding the whole index.
+        """
+        now = time.time()
+        records = (PromoRecord.from_dict(p) for p in upserts)
+        records = [r for r in records if not self.is_expired(r, now)]
+        # Updated records that are now expired still have to leave the index
+        removed_ids = set(removed_ids) | ({p.get("id") for p in upserts} - {r.id for r in records})
         
-        if os.path.exists(DATA_FILE):
+        with self._write_lock:
+            current = self.snapshot
+            self._publish(current.apply(records, removed_ids, current.version + 1))
+        print(f"Applied delta: {len(records)} upserted, {len(removed_ids)} removed ({len(self.promotions)} active)")
+        return len(records) + len(removed_ids)
+
+    def refresh(self):
+        """
+        Sync new data if the file is stale. A delta on top of the loaded file is
+        applied in place; any other change to the file is loaded as a whole.
+        """
+        was_current = self._data_mtime() == self._loaded_mtime
+        delta = self.check_and_update_data()
+        mtime = self._data_mtime()
+        if delta is not None and was_current:
+            if delta["upserts"] or delta["removed"]:
+                self.apply_delta(delta["upserts"], delta["removed"])
+            self._loaded_mtime = mtime
+        elif mtime is not None and mtime != self._loaded_mtime:
+            self.load_data()
+        if delta is not None and not delta["not_modified"] and SNAPSHOT_FILE:
+            self._save_snapshot()
+        self.expire_due()
+
+    def _save_snapshot(self):
+        """Save the published snapshot (already indexed) as SNAPSHOT_FILE for the next cold start."""
+        # One filtered in an earlier year may still hold promotions of that year - index the file again
+        snapshot = self.snapshot if self._snapshot_year == datetime.now().year else None
+        try:
+            write_snapshot_file(snapshot=snapshot)
+        except OSError as e:
+            print(f"Could not write {SNAPSHOT_FILE.name}: {e}")
+
+    @staticmethod
+    def _data_mtime():
+        return os.path.getmtime(DATA_FILE) if os.path.exists(DATA_FILE) else None
+
+    @staticmethod
+    def data_writable() -> bool:
+        """Whether syncs can update DATA_FILE (read-only deployments such as serverless cannot)."""
+        path = DATA_FILE if os.path.exists(DATA_FILE) else DATA_FILE.parent
+        return os.access(path, os.W_OK)
+
+    def start_refresh(self, interval: float):
+        """Run refresh() now and then every interval seconds on a daemon thread."""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        if not self.data_writable():
+            # Fetching would only repeat every interval - the synced data could never be saved
+            print(f"{DATA_FILE.parent} is read-only: background refresh only drops expired promotions")
+        self._stop_refresh.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, args=(interval,), name="promotions-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_refresh(self):
+        self._stop_refresh.set()
+
+    def _refresh_loop(self, interval: float):
+        while True:
             try:
-                with open(DATA_FILE, "r", encoding="utf-8") as f:
-                    all_promos = json.load(f)
-                    
-                    # Filter out expired promotions
-                    self.promotions = [p for p in all_promos if not self.is_expired(p)]
-                    print(f"Loaded {len(self.promotions)} active promotions (filtered {len(all_promos) - len(self.promotions)} expired)")
+                self.refresh()
             except Exception as e:
-                print(f"Error loading data: {e}")
-        else:
-            print("Warning: promotions.json not found.")
+                print(f"Background refresh failed: {e}")
+            if self._stop_refresh.wait(interval):
+                return
 
     def check_and_update_data(self):
-        """Check if data file is old or missing, and fetch new data if needed."""
+        """
+        Check if data file is old or missing, and sync new data if needed.
+        Returns the sync delta (see src.utils.sync.sync_promotions), or None if nothing was synced.
+        """
+        from src.utils.sync import last_synced
         should_update = False
         
+        if not self.data_writable():
+            return None
         if not os.path.exists(DATA_FILE):
             print("Data file missing. Triggering update...")
             should_update = True
         else:
-            # Check file age (1 hour = 3600 seconds)
-            file_mod_time = os.path.getmtime(DATA_FILE)
+            # Check data age (DATA_MAX_AGE, 1 hour by default) - an unchanged sync leaves the file untouched
+            synced_at = last_synced(DATA_FILE)
             current_time = datetime.now().timestamp()
-            if current_time - file_mod_time > 3600:
-                print("Data file is older than 1 hour. Triggering update...")
+            if current_time - synced_at > DATA_MAX_AGE:
+                print(f"Data was last synced over {DATA_MAX_AGE:.0f} seconds ago. Triggering update...")
                 should_update = True
         
         if should_update:
@@ -240,7 +458,8 @@ class SearchEngine:
                 import sys
                 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
                 
-                from src.utils.fetcher import login, fetch_promotions_data
+                from src.utils.fetcher import login
+                from src.utils.sync import sync_promotions
                 # We need process_promotions from api/promotions (or move it to utils?)
                 # For now, let's import it carefully
                 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -249,139 +468,241 @@ class SearchEngine:
                 print("Logging in to fetch new data...")
                 token = login()
                 if token:
-                    print("Fetching promotions...")
-                    raw_data = fetch_promotions_data(token)
-                    if raw_data:
-                        print(f"Processing {len(raw_data)} items...")
-                        processed_data = process_promotions(raw_data)
-                        
-                        # Save to file
-                        os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-                        with open(DATA_FILE, "w", encoding="utf-8") as f:
-                            json.dump(processed_data, f, ensure_ascii=False, indent=2)
-                        print("Data updated successfully.")
+                    print("Syncing promotions...")
+                    delta = sync_promotions(token, DATA_FILE, process_promotions)
+                    if delta["not_modified"]:
+                        print("Data not modified upstream.")
+                    else:
+                        print(f"Data synced: {len(delta['added'])} added, {len(delta['changed'])} changed, "
+                              f"{len(delta['removed'])} removed")
+                    return delta
             except Exception as e:
                 print(f"Failed to auto-update data: {e}")
+        return None
 
 
-    def search(self, query: str):
-        if not query:
-            return []
+    def _query_terms(self, query: str):
+        """
+        Split a query into term groups [(normalized synonym variants, fuzzy term)].
+        Words are segmented like the index (Thai has no spaces); multi-term
+        queries also get the whole phrase as an extra group.
+        """
+        query = normalize(query)
+        segmenter = get_segmenter()
+        terms = []
+        for word in query.split():
+            for term in segmenter.segment(word):
+                # Minimum term length - ต้องมีอย่างน้อย 2 ตัวอักษร, ไม่ค้นหา stop word
+                if len(term) >= 2 and term not in NORMALIZED_STOP_WORDS and term not in terms:
+                    terms.append(term)
         
-        query = query.lower().strip()
-        
-        # Minimum query length - ต้องมีอย่างน้อย 2 ตัวอักษร
-        if len(query) < 2:
+        if not terms:
             return []
         
-        # ถ้าเป็น stop word ไม่ค้นหา
-        if query in STOP_WORDS:
-            return []
+        # Expand each term using synonyms
+        groups = [({term, *NORMALIZED_SYNONYMS.get(term, ())}, term) for term in terms]
+        if len(terms) > 1:
+            groups.append(({query, *NORMALIZED_SYNONYMS.get(query, ())}, None))
+        return groups
+
+    def _score(self, query: str, snapshot: SearchSnapshot, memo: dict = None):
+        """
+        Score documents for query. Returns ({doc: score}, {doc: matched terms}).
+        memo shares term lookups between the queries of a batch (see BM25Scorer.score).
+        """
+        if not query:
+            return {}, {}
         
-        # Expand query using synonyms
-        search_terms = [query]
-        if query in SYNONYMS:
-            search_terms.extend(SYNONYMS[query])
-            search_terms = list(set(search_terms))  # Remove duplicates
+        groups = self._query_terms(query.strip())
+        if not groups:
+            return {}, {}
         
-        results = []
+        return snapshot.scorer.score(groups, memo)
+
+    def _cached_score(self, query: str, snapshot: SearchSnapshot, memo: dict = None):
+        """_score with an LRU cache keyed by normalized query and snapshot version."""
+        key = (normalize(query or '').strip(), snapshot.version)
+        cached = self.result_cache.get(key)
+        if cached is None:
+            cached = self._score(query, snapshot, memo)
+            self.result_cache.put(key, cached)
+        return cached
+
+    def _highlight(self, record: PromoRecord, highlighter: Highlighter) -> SearchHit:
+        return SearchHit(record, {
+            'title': highlighter.mark(record.title),
+            'description': highlighter.mark(record.description)
+        })
+
+    def search_page(self, query: str, offset: int = 0, limit: int = 20):
+        """
+        Return (hits, total) for one page of results, best score first.
+        Only the top offset+limit documents are selected (heap) and only the
+        returned page is highlighted.
+        """
+        # Everything below uses this one snapshot, even if a refresh publishes another
+        snapshot = self.snapshot
+        scores, matched = self._cached_score(query, snapshot)
+        scores = self._live_scores(snapshot, scores, time.time())
+        total = len(scores)
+        if limit is None:
+            limit = total
+        if limit <= 0 or offset < 0 or offset >= total:
+            return [], total
         
-        for promo in self.promotions:
-            score = 0
-            
-            title = promo.get('title', '')
-            description = promo.get('description', '')
-            content = promo.get('content', '')
-            promo_type = promo.get('promotion_type', '')
-            
-            title_lower = title.lower()
-            desc_lower = description.lower()
-            content_lower = content.lower()
-            type_lower = promo_type.lower()
-            
-            matched_terms = set()
-            
-            # Check all synonym variants
-            for term in search_terms:
-                term_len = len(term)
-                
-                # 1. Exact Match Logic
-                if term in title_lower:
-                    if re.search(r'\b' + re.escape(term) + r'\b', title_lower):
-                        score += 100
-                    else:
-                        score += 70
-                    matched_terms.add(term)
-                
-                if term in type_lower:
-                    score += 50
-                    matched_terms.add(term)
-                
-                if term_len >= 5 and term in desc_lower:
-                    score += 20
-                    matched_terms.add(term)
-                
-                if term_len >= 6 and term in content_lower:
-                    score += 10
-                    matched_terms.add(term)
-                
-                # Keyword match
-                keywords = promo.get('keywords', [])
-                if term_len >= 3:
-                    for kw in keywords:
-                        if kw and len(kw) >= 3 and kw not in STOP_WORDS:
-                            if term == kw.lower():
-                                score += 25
-                                matched_terms.add(term)
-                                break
-            
-            # 2. Fuzzy Match (If no exact match found yet)
-            if score == 0 and len(query) > 4:
-                # Check fuzzy match against title only
-                import difflib
-                
-                # Split title into words to check against query
-                title_words = title_lower.split()
-                for word in title_words:
-                    if len(word) > 4:
-                        ratio = difflib.SequenceMatcher(None, query, word).ratio()
-                        if ratio > 0.8:  # 80% similarity
-                            score += 40
-                            matched_terms.add(word)
-                            break
-            
-            if score > 0:
-                # Add highlighting
-                highlighted_title = title
-                highlighted_desc = description
-                
-                # Simple highlight replacement (case-insensitive)
-                for term in matched_terms:
-                    # Escape special regex chars
-                    pattern = re.compile(re.escape(term), re.IGNORECASE)
-                    highlighted_title = pattern.sub(lambda m: f"<em>{m.group(0)}</em>", highlighted_title)
-                    highlighted_desc = pattern.sub(lambda m: f"<em>{m.group(0)}</em>", highlighted_desc)
-                
-                promo_copy = promo.copy()
-                promo_copy['highlight'] = {
-                    'title': highlighted_title,
-                    'description': highlighted_desc
-                }
-                
-                results.append((promo_copy, score))
+        return self._ranked_page(snapshot, scores, matched, scores, offset, limit), total
+
+    @staticmethod
+    def _live_scores(snapshot: SearchSnapshot, scores: dict, now: float) -> dict:
+        """scores without the documents that expired since snapshot was built."""
+        expired, _ = snapshot.expired(now)
+        if not expired or scores.keys().isdisjoint(expired):
+            return scores
+        return {doc: score for doc, score in scores.items() if doc not in expired}
+
+    def _ranked_page(self, snapshot: SearchSnapshot, scores: dict, matched: dict, docs, offset: int, limit: int):
+        """Highlighted hits for docs[offset:offset + limit] in score order."""
+        # Ties keep file order (same as a stable sort on score)
+        page = heapq.nsmallest(offset + limit, docs, key=lambda d: (-scores[d], d))[offset:]
+        
+        # One automaton for every term matched on this page
+        highlighter = Highlighter(set().union(*(matched[doc] for doc in page)))
+        records = snapshot.index.records
+        return [self._highlight(records[doc], highlighter) for doc in page]
+
+    def search_filtered(self, query: str, filters: dict, offset: int = 0, limit: int = 20):
+        """
+        Return (hits, total, facet counts, version) for one page of results
+        matching every {facet: value} in filters (see src.search.facets.FACETS),
+        and the data version they were found at.
+        With a query, hits are ranked by score; without one, every active
+        promotion is a candidate, newest first. Filters are bitset ANDs with
+        the candidates; counts cover all candidates (not just this page).
+        """
+        snapshot = self.snapshot
+        return (*self._filtered_page(snapshot, time.time(), query, filters, offset, limit), snapshot.version)
+
+    def search_batch(self, queries: list):
+        """
+        Answer several searches at once. queries is a list of
+        {"q", "filters", "offset", "limit"}; returns ([(hits, total, facet counts)
+        for each], version). All of them see one snapshot (of that data version),
+        a query repeated in the batch is scored once, and terms whose synonym
+        expansions are the same share their index lookups.
+        """
+        snapshot = self.snapshot
+        now = time.time()
+        # variant set -> exact term frequencies, for every query in this batch
+        memo = {}
+        results = [
+            self._filtered_page(snapshot, now, q.get('q') or '', q.get('filters') or {},
+                                q.get('offset', 0), q.get('limit', 20), memo)
+            for q in queries
+        ]
+        return results, snapshot.version
+
+    def _filtered_page(self, snapshot: SearchSnapshot, now: float, query: str, filters: dict,
+                       offset: int, limit: int, memo: dict = None):
+        facets = snapshot.index.facets
+        filters = {facet: value for facet, value in filters.items() if value}
+        if query:
+            scores, matched = self._cached_score(query, snapshot, memo)
+            scores = self._live_scores(snapshot, scores, now)
+            candidates = to_bits(scores)
+        else:
+            candidates = facets.live & ~snapshot.expired(now)[1]
         
-        # Sort by score descending
-        results.sort(key=lambda x: x[1], reverse=True)
+        selected = facets.match(candidates, filters)
+        counts = facets.counts(candidates, filters)
+        total = selected.bit_count()
+        if limit <= 0 or offset < 0 or offset >= total:
+            return [], total, counts
         
-        # Return only promos (without scores)
-        return [r[0] for r in results]
+        # Only a page that is actually returned needs the document numbers
+        selected = scores if query and not filters else from_bits(selected)
+        if query:
+            return self._ranked_page(snapshot, scores, matched, selected, offset, limit), total, counts
+        records = snapshot.index.records
+        selected_records = {records[doc] for doc in selected}
+        page = [r for r in snapshot.promotions if r in selected_records][offset:offset + limit]
+        return page, total, counts
 
-    def get_latest(self, n=50):
-        return self.promotions[:n]
+    def search_ids(self, query: str):
+        """
+        Return (ids, version): promotion ids of every result, best score first,
+        and the data version they were ranked at. Nothing is highlighted.
+        """
+        snapshot = self.snapshot
+        scores, _ = self._cached_score(query, snapshot)
+        scores = self._live_scores(snapshot, scores, time.time())
+        records = snapshot.index.records
+        ranked = sorted(scores, key=lambda d: (-scores[d], d))
+        return [records[doc].id for doc in ranked], snapshot.version
 
-    def get_by_id(self, promo_id: int):
-        for promo in self.promotions:
-            if promo.get('id') == promo_id:
-                return promo
-        return None
+    def search(self, query: str):
+        """Return all results for query, best score first."""
+        return self.search_page(query, 0, None)[0]
 
+    def get_latest(self, n=50, with_version=False):
+        """Newest live promotions; with_version also returns the data version they were read from."""
+        snapshot = self.snapshot
+        expired, _ = snapshot.expired(time.time())
+        if not expired:
+            latest = snapshot.promotions[:n]
+        else:
+            records = snapshot.index.records
+            expired = {records[doc] for doc in expired}
+            latest = list(itertools.islice((r for r in snapshot.promotions if r not in expired), n))
+        return (latest, snapshot.version) if with_version else latest
+
+    @staticmethod
+    def _live_record(snapshot: SearchSnapshot, promo_id: int, now: float):
+        record = snapshot.by_id.get(promo_id)
+        if record is None or (record.expires_at is not None and record.expires_at <= now):
+            return None
+        return record
+
+    def get_by_id(self, promo_id: int, with_version=False):
+        """Live promotion promo_id or None; with_version also returns the data version it was read from."""
+        snapshot = self.snapshot
+        record = self._live_record(snapshot, promo_id, time.time())
+        return (record, snapshot.version) if with_version else record
+
+    def get_by_ids(self, promo_ids):
+        """Return (records, version): the live promotions of promo_ids in order, read from one snapshot."""
+        snapshot, now = self.snapshot, time.time()
+        records = (self._live_record(snapshot, promo_id, now) for promo_id in promo_ids)
+        return [r for r in records if r is not None], snapshot.version
+
+def active_records(all_promos: list, now: float = None) -> list:
+    """PromoRecords of the promotions from promotions.json that are not expired at now."""
+    now = time.time() if now is None else now
+    records = (PromoRecord.from_dict(p) for p in all_promos)
+    return [r for r in records if not SearchEngine.is_expired(r, now)]
+
+
+def build_snapshot(all_promos: list, now: float = None) -> SearchSnapshot:
+    """Index the promotions from promotions.json that are not expired at now."""
+    return SearchSnapshot.build(active_records(all_promos, now), 0, NORMALIZED_STOP_WORDS)
+
+
+def write_snapshot_file(data_file=None, snapshot_file=None, force: bool = False,
+                        snapshot: SearchSnapshot = None) -> bool:
+    """
+    Prebuild the binary snapshot of data_file for fast cold starts. snapshot is
+    an already built one of the same data (e.g. the published snapshot after a
+    sync) to save instead of indexing the file again.
+    Returns False (nothing written) if the existing snapshot is already current.
+    """
+    data_file = DATA_FILE if data_file is None else data_file
+    snapshot_file = SNAPSHOT_FILE if snapshot_file is None else snapshot_file
+    with open(data_file, "rb") as f:
+        raw = f.read()
+    now = time.time()
+    digest, year, config = source_digest(raw), datetime.fromtimestamp(now).year, index_config_digest()
+    if not force and snapshot_matches(snapshot_file, digest, year, config):
+        return False
+    if snapshot is None:
+        snapshot = build_snapshot(json.loads(raw), now)
+    save_snapshot(snapshot, snapshot_file, digest, year, config)
+    return True
@@ -0,0 +1,145 @@
+"""
+Facet bitsets for filtered search and facet counts.
+For every facet value (category, promotion_type, bank, brand) the index keeps
+the set of documents carrying it as an int bitset (bit n = document n), so a
+filter is an AND with the query's candidates and a count is a popcount.
+Bitsets are converted to and from document lists with numpy, in time linear
+in the number of documents. Banks and brands are detected from title,
+description and keywords.
+"""
+import re
+
+import numpy as np
+
+from src.utils.thai_text import normalize
+
+FACETS = ('category', 'promotion_type', 'bank', 'brand')
+
+# Facet value -> spellings (English matched as whole words, Thai as substrings)
+BANKS = {
+    'KBank': ('kbank', 'กสิกร'),
+    'SCB': ('scb', 'ไทยพาณิชย์'),
+    'Bangkok Bank': ('bbl', 'ธนาคารกรุงเทพ'),
+    'Krungsri': ('krungsri', 'กรุงศรี'),
+    'KTC': ('ktc', 'ktb', 'กรุงไทย', 'เคทีซี'),
+    'UOB': ('uob', 'ยูโอบี'),
+    'ttb': ('ttb', 'tmb', 'ทีเอ็มบี', 'ทีทีบี'),
+    'AEON': ('aeon', 'อิออน'),
+}
+BRANDS = {
+    'Apple': ('apple', 'iphone', 'ipad', 'macbook', 'imac', 'airpods', 'แอปเปิ้ล', 'แอปเปิล', 'ไอโฟน', 'ไอแพด'),
+    'Samsung': ('samsung', 'ซัมซุง'),
+    'Sony': ('sony', 'โซนี่'),
+    'HP': ('hp', 'เอชพี'),
+    'Canon': ('canon', 'แคนนอน'),
+    'Epson': ('epson', 'เอปสัน'),
+    'Lenovo': ('lenovo', 'เลโนโว่', 'เลอโนโว'),
+    'Dell': ('dell', 'เดลล์'),
+    'Asus': ('asus', 'เอซุส', 'อัสซุส'),
+    'Acer': ('acer', 'เอเซอร์'),
+    'Microsoft': ('microsoft', 'ไมโครซอฟท์'),
+}
+
+
+def _pattern(spellings) -> re.Pattern:
+    parts = []
+    for spelling in spellings:
+        spelling = normalize(spelling)
+        if spelling.isascii():
+            parts.append(rf'(?<![a-z0-9]){re.escape(spelling)}(?![a-z0-9])')
+        else:
+            parts.append(re.escape(spelling))
+    return re.compile('|'.join(parts))
+
+
+BANK_PATTERNS = {name: _pattern(spellings) for name, spellings in BANKS.items()}
+BRAND_PATTERNS = {name: _pattern(spellings) for name, spellings in BRANDS.items()}
+
+
+def facet_values(record) -> list:
+    """[(facet, value)] for one PromoRecord."""
+    values = []
+    if record.category:
+        values.append(('category', record.category))
+    if record.promotion_type:
+        values.append(('promotion_type', record.promotion_type))
+    text = ' '.join((record.title_lower, record.description_lower, *record.keyword_set))
+    values.extend(('bank', name) for name, pattern in BANK_PATTERNS.items() if pattern.search(text))
+    values.extend(('brand', name) for name, pattern in BRAND_PATTERNS.items() if pattern.search(text))
+    return values
+
+
+def to_bits(docs) -> int:
+    """Bitset of the document numbers in docs (any iterable of ints)."""
+    docs = np.fromiter(docs, dtype=np.int64)
+    if not docs.size:
+        return 0
+    mask = np.zeros(docs.max() + 1, dtype=bool)
+    mask[docs] = True
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+
+def from_bits(bits: int) -> list:
+    """Document numbers in bits, ascending."""
+    if not bits:
+        return []
+    data = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder='little')).tolist()
+
+
+class FacetIndex:
+    def __init__(self):
+        # facet -> value -> bitset of documents
+        self.bits = {facet: {} for facet in FACETS}
+        # Bitset of every live document
+        self.live = 0
+        # document -> its [(facet, value)], for remove()
+        self.doc_values = {}
+
+    def add(self, doc: int, record):
+        values = facet_values(record)
+        bit = 1 << doc
+        for facet, value in values:
+            by_value = self.bits[facet]
+            by_value[value] = by_value.get(value, 0) | bit
+        self.live |= bit
+        self.doc_values[doc] = values
+
+    def remove(self, doc: int):
+        bit = 1 << doc
+        for facet, value in self.doc_values.pop(doc, ()):
+            by_value = self.bits[facet]
+            remaining = by_value.get(value, 0) & ~bit
+            if remaining:
+                by_value[value] = remaining
+            else:
+                by_value.pop(value, None)
+        self.live &= ~bit
+
+    def copy(self):
+        clone = FacetIndex.__new__(FacetIndex)
+        # ints are immutable - copying the dicts is enough
+        clone.bits = {facet: dict(by_value) for facet, by_value in self.bits.items()}
+        clone.live = self.live
+        clone.doc_values = dict(self.doc_values)
+        return clone
+
+    def match(self, candidates: int, filters: dict, skip: str = None) -> int:
+        """candidates restricted to documents with every {facet: value} in filters (except facet skip)."""
+        for facet, value in filters.items():
+            if facet != skip:
+                candidates &= self.bits[facet].get(value, 0)
+        return candidates
+
+    def counts(self, candidates: int, filters: dict) -> dict:
+        """
+        {facet: {value: documents}} among candidates. Each facet is counted
+        with the other facets' filters applied, so a count is the number of
+        results selecting that value would give.
+        """
+        counts = {}
+        for facet in FACETS:
+            base = self.match(candidates, filters, skip=facet)
+            by_value = {value: (bits & base).bit_count() for value, bits in self.bits[facet].items()}
+            counts[facet] = dict(sorted(((v, n) for v, n in by_value.items() if n), key=lambda item: -item[1]))
+        return counts
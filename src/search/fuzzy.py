@@ -0,0 +1,90 @@
+"""
+Fuzzy (typo-tolerant) matching over the title vocabulary.
+Title words are indexed by character q-grams once at load time, so a typo
+query is only compared with words that share a q-gram with it.
+Bigrams are used rather than trigrams: with trigrams, transposition typos
+such as 'ipohne' -> 'iphone' share no gram with the intended word.
+"""
+import difflib
+from collections import defaultdict
+
+GRAM_SIZE = 2
+
+# Same thresholds the original per-document fuzzy fallback used
+MIN_WORD_LENGTH = 5   # only title words longer than 4 characters
+SIMILARITY = 0.8      # SequenceMatcher ratio must be above this
+
+
+def qgrams(text: str) -> set:
+    if len(text) < GRAM_SIZE:
+        return {text} if text else set()
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class FuzzyIndex:
+    def __init__(self):
+        # q-gram -> set of vocabulary words
+        self.grams = defaultdict(set)
+        # word -> {document number: position of the word among the doc's long title words}
+        self.words = defaultdict(dict)
+
+    def add(self, doc: int, title_lower: str):
+        position = 0
+        for word in title_lower.split():
+            if len(word) < MIN_WORD_LENGTH:
+                continue
+            postings = self.words[word]
+            if not postings:
+                for gram in qgrams(word):
+                    self.grams[gram].add(word)
+            postings.setdefault(doc, position)
+            position += 1
+
+    def remove(self, doc: int, title_lower: str):
+        for word in set(title_lower.split()):
+            postings = self.words.get(word)
+            if not postings or doc not in postings:
+                continue
+            del postings[doc]
+            if not postings:
+                del self.words[word]
+                for gram in qgrams(word):
+                    words = self.grams.get(gram)
+                    if words is not None:
+                        words.discard(word)
+                        if not words:
+                            del self.grams[gram]
+
+    def copy(self):
+        clone = FuzzyIndex()
+        clone.grams.update((gram, set(words)) for gram, words in self.grams.items())
+        clone.words.update((word, dict(docs)) for word, docs in self.words.items())
+        return clone
+
+    def similar_words(self, query: str) -> dict:
+        """Vocabulary words whose similarity to query is above SIMILARITY."""
+        query_len = len(query)
+        candidates = set()
+        for gram in qgrams(query):
+            candidates |= self.grams.get(gram, set())
+
+        matches = {}
+        for word in candidates:
+            # ratio = 2*M / (len_a + len_b) can never exceed 2*min / (len_a + len_b)
+            if 2 * min(query_len, len(word)) <= SIMILARITY * (query_len + len(word)):
+                continue
+            ratio = difflib.SequenceMatcher(None, query, word).ratio()
+            if ratio > SIMILARITY:
+                matches[word] = ratio
+        return matches
+
+    def match(self, query: str, exclude=()) -> dict:
+        """Map document number -> the first similar word in its title."""
+        best = {}
+        for word in self.similar_words(query):
+            for doc, position in self.words[word].items():
+                if doc in exclude:
+                    continue
+                if doc not in best or position < best[doc][0]:
+                    best[doc] = (position, word)
+        return {doc: word for doc, (_, word) in best.items()}
@@ -0,0 +1,86 @@
+"""
+Single-pass highlighter for search results.
+All matched terms of a query are compiled into one Aho-Corasick automaton,
+which scans the normalized text once; overlapping hits are merged so <em>
+tags are never nested, and positions are mapped back to the original text.
+"""
+from collections import deque
+
+from src.utils.thai_text import normalize_with_offsets
+
+
+class Highlighter:
+    def __init__(self, terms):
+        # Trie: goto[node] = {char: node}, out[node] = longest term length ending here
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [0]
+        for term in terms:
+            if term:
+                self._add(term)
+        self._build()
+
+    def _add(self, term: str):
+        node = 0
+        for char in term:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(0)
+            node = nxt
+        self.out[node] = max(self.out[node], len(term))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(char, 0)
+                self.fail[child] = fallback if fallback != child else 0
+                # A node also ends every term its fail state ends
+                self.out[child] = max(self.out[child], self.out[self.fail[child]])
+
+    def spans(self, text: str) -> list:
+        """Merged (start, end) spans of all term occurrences in normalized text."""
+        spans = []
+        node = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for pos, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            length = out[node]
+            if not length:
+                continue
+            start = pos + 1 - length
+            # Merge with earlier hits it overlaps or touches
+            while spans and start <= spans[-1][1]:
+                start = min(start, spans.pop()[0])
+            spans.append((start, pos + 1))
+        return spans
+
+    def mark(self, text: str) -> str:
+        """Wrap every term occurrence of the original text in <em> tags."""
+        if not text or len(self.goto) == 1:
+            return text
+        normalized, starts, ends = normalize_with_offsets(text)
+        spans = self.spans(normalized)
+        if not spans:
+            return text
+
+        parts = []
+        last = 0
+        for start, end in spans:
+            orig_start, orig_end = starts[start], ends[end - 1]
+            parts.append(text[last:orig_start])
+            parts.append(f"<em>{text[orig_start:orig_end]}</em>")
+            last = orig_end
+        parts.append(text[last:])
+        return ''.join(parts)
@@ -0,0 +1,196 @@
+"""
+Inverted index used by SearchEngine.
+Character n-gram postings per text field (works for Thai text with no spaces),
+token postings from Thai word segmentation, and exact keyword postings,
+built once when data is loaded.
+"""
+from collections import Counter, defaultdict
+
+from src.search.facets import FacetIndex
+from src.search.fuzzy import FuzzyIndex
+from src.utils.thai_text import get_segmenter
+
+# Bigrams: short enough for 2-character Thai terms like 'ลด'
+NGRAM_SIZE = 2
+
+# Searchable field -> normalized attribute on PromoRecord
+INDEXED_FIELDS = {
+    'title': 'title_lower',
+    'promotion_type': 'type_lower',
+    'description': 'description_lower',
+    'content': 'content_lower',
+}
+
+
+def ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    """Return the set of character n-grams in text."""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NgramIndex:
+    def __init__(self, records: list, stop_words=()):
+        self.stop_words = stop_words
+        # Document number = position in records (None once removed)
+        self.records = []
+        self.live = 0
+        # field -> n-gram -> set of document numbers
+        self.postings = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        # field -> token -> {document number: occurrences}
+        self.tokens = {field: defaultdict(dict) for field in INDEXED_FIELDS}
+        # Documents whose content is the same string as description (not indexed twice)
+        self.shared_content = set()
+        # normalized keyword -> set of document numbers
+        self.keywords = defaultdict(set)
+        # q-gram index over title words for typo-tolerant matching
+        self.fuzzy = FuzzyIndex()
+        # category/type/bank/brand bitsets for filtering
+        self.facets = FacetIndex()
+
+        for record in records:
+            self.add(record)
+
+    @property
+    def size(self) -> int:
+        """Number of document numbers handed out, including removed ones."""
+        return len(self.records)
+
+    def live_docs(self):
+        return (doc for doc, record in enumerate(self.records) if record is not None)
+
+    def add(self, record) -> int:
+        """Index one PromoRecord and return its document number."""
+        doc = len(self.records)
+        self.records.append(record)
+        self.live += 1
+        segmenter = get_segmenter()
+
+        for field, attr in INDEXED_FIELDS.items():
+            if field == 'content' and record.content_lower is record.description_lower:
+                self.shared_content.add(doc)
+                continue
+            text = getattr(record, attr)
+            postings = self.postings[field]
+            for gram in ngrams(text):
+                postings[gram].add(doc)
+            tokens = self.tokens[field]
+            for token, count in Counter(segmenter.segment(text)).items():
+                tokens[token][doc] = count
+
+        for kw in record.keyword_set:
+            if len(kw) >= 2 and kw not in self.stop_words:
+                self.keywords[kw].add(doc)
+
+        self.fuzzy.add(doc, record.title_lower)
+        self.facets.add(doc, record)
+        return doc
+
+    def remove(self, doc: int):
+        """Drop a document from every posting list; its number is not reused."""
+        record = self.records[doc]
+        if record is None:
+            return
+        segmenter = get_segmenter()
+
+        for field, attr in INDEXED_FIELDS.items():
+            if field == 'content' and doc in self.shared_content:
+                self.shared_content.discard(doc)
+                continue
+            text = getattr(record, attr)
+            postings = self.postings[field]
+            for gram in ngrams(text):
+                docs = postings.get(gram)
+                if docs is not None:
+                    docs.discard(doc)
+                    if not docs:
+                        del postings[gram]
+            tokens = self.tokens[field]
+            for token in set(segmenter.segment(text)):
+                docs = tokens.get(token)
+                if docs is not None:
+                    docs.pop(doc, None)
+                    if not docs:
+                        del tokens[token]
+
+        for kw in record.keyword_set:
+            docs = self.keywords.get(kw)
+            if docs is not None:
+                docs.discard(doc)
+                if not docs:
+                    del self.keywords[kw]
+
+        self.fuzzy.remove(doc, record.title_lower)
+        self.facets.remove(doc)
+        self.records[doc] = None
+        self.live -= 1
+
+    def copy(self):
+        """Independent copy that can be updated without touching this index."""
+        clone = NgramIndex.__new__(NgramIndex)
+        clone.stop_words = self.stop_words
+        clone.records = list(self.records)
+        clone.live = self.live
+        clone.postings = {field: defaultdict(set, {gram: set(docs) for gram, docs in postings.items()})
+                          for field, postings in self.postings.items()}
+        clone.tokens = {field: defaultdict(dict, {token: dict(docs) for token, docs in tokens.items()})
+                        for field, tokens in self.tokens.items()}
+        clone.shared_content = set(self.shared_content)
+        clone.keywords = defaultdict(set, {kw: set(docs) for kw, docs in self.keywords.items()})
+        clone.fuzzy = self.fuzzy.copy()
+        clone.facets = self.facets.copy()
+        return clone
+
+    def text(self, field: str, doc: int) -> str:
+        return getattr(self.records[doc], INDEXED_FIELDS[field])
+
+    def candidates(self, field: str, term: str):
+        """Documents whose field may contain term (superset, needs verification)."""
+        if len(term) < NGRAM_SIZE:
+            return self.live_docs()
+
+        postings = self.postings[field]
+        lists = []
+        for gram in ngrams(term):
+            docs = postings.get(gram)
+            if not docs:
+                return ()
+            lists.append(docs)
+
+        lists.sort(key=len)
+        result = set(lists[0])
+        for docs in lists[1:]:
+            result &= docs
+            if not result:
+                break
+        return result
+
+    def lookup(self, field: str, term: str) -> list:
+        """Documents whose field contains term as a substring."""
+        attr = INDEXED_FIELDS[field]
+        records = self.records
+        if field != 'content':
+            return [doc for doc in self.candidates(field, term) if term in getattr(records[doc], attr)]
+
+        shared = self.shared_content
+        docs = [doc for doc in self.candidates(field, term)
+                if doc not in shared and term in getattr(records[doc], attr)]
+        docs.extend(doc for doc in self.lookup('description', term) if doc in shared)
+        return docs
+
+    def is_token(self, term: str) -> bool:
+        """Whether term segments into exactly one token (itself)."""
+        return get_segmenter().segment(term) == [term]
+
+    def lookup_token(self, field: str, token: str) -> dict:
+        """Documents whose field contains token as a whole word: {doc: occurrences}."""
+        docs = self.tokens[field].get(token, {})
+        if field == 'content' and self.shared_content:
+            shared = self.shared_content
+            docs = {**docs, **{doc: count for doc, count in self.tokens['description'].get(token, {}).items()
+                               if doc in shared}}
+        return docs
+
+    def lookup_keyword(self, term: str) -> set:
+        """Documents that have term as an exact keyword."""
+        return self.keywords.get(term, set())
@@ -0,0 +1,148 @@
+"""
+Compact in-memory representation of promotions for SearchEngine.
+Records use __slots__, keep normalized (lowercased, Thai spelling folded)
+fields for matching and share identical strings (interned) across records.
+"""
+import sys
+from datetime import datetime
+from urllib.parse import quote, urlparse
+
+from src.utils.dates import duration_text, parse_datetime
+from src.utils.thai_text import normalize
+
+# Public fields, in the same order as promotions.json
+FIELDS = (
+    'id', 'title', 'link', 'description', 'content', 'duration',
+    'start_date', 'end_date', 'category', 'promotion_type', 'attachments', 'keywords'
+)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def encode_url(url: str) -> str:
+    """url with its path percent-encoded (Thai file names), as LINE uri actions need."""
+    if not url:
+        return url
+    try:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}{quote(parsed.path, safe='/')}"
+    except ValueError:
+        return url
+
+
+def _normalize(value: str) -> str:
+    """Normalize value, reusing the same object when nothing changes."""
+    normalized = normalize(value)
+    return value if normalized == value else sys.intern(normalized)
+
+
+class PromoRecord:
+    __slots__ = (
+        'id', 'title', 'link', 'description', '_content', '_duration',
+        'start_date', 'end_date', 'category', 'promotion_type', 'attachments', 'keywords',
+        'attachment_uris', 'expires_at', 'title_lower', 'description_lower', 'content_lower', 'type_lower', 'keyword_set'
+    )
+
+    @classmethod
+    def from_dict(cls, promo: dict) -> 'PromoRecord':
+        record = cls()
+        record.id = promo.get('id')
+        record.title = _intern(promo.get('title') or '')
+        record.link = promo.get('link', '')
+        record.description = _intern(promo.get('description') or '')
+        # content is usually a copy of description - store it only when it differs
+        content = promo.get('content') or ''
+        record._content = None if content == record.description else _intern(content)
+        # Text from sync time, only used when end_date is missing
+        record._duration = _intern(promo.get('duration', ''))
+        record.start_date = _intern(promo.get('start_date', ''))
+        record.end_date = _intern(promo.get('end_date', ''))
+        end = parse_datetime(record.end_date)
+        record.expires_at = end.timestamp() if end else None
+        record.category = _intern(promo.get('category'))
+        record.promotion_type = _intern(promo.get('promotion_type') or '')
+        record.attachments = tuple(
+            {'text': _intern(att.get('text', '')), 'url': att.get('url', '')}
+            for att in promo.get('attachments') or []
+        )
+        # Encoded once here instead of on every reply that shows the record
+        record.attachment_uris = tuple(encode_url(att['url']) for att in record.attachments)
+        record.keywords = tuple(_intern(kw) for kw in promo.get('keywords') or [] if kw)
+
+        # Pre-normalized fields for matching (see src.utils.thai_text.normalize)
+        record.title_lower = _normalize(record.title)
+        record.description_lower = _normalize(record.description)
+        record.content_lower = record.description_lower if record._content is None else _normalize(record._content)
+        record.type_lower = _normalize(record.promotion_type)
+        record.keyword_set = frozenset(_normalize(kw) for kw in record.keywords)
+        return record
+
+    @property
+    def content(self) -> str:
+        return self.description if self._content is None else self._content
+
+    @property
+    def duration(self) -> str:
+        """Remaining time, computed now from end_date."""
+        if self.expires_at is None:
+            return self._duration
+        return duration_text(datetime.fromtimestamp(self.expires_at))
+
+    def get(self, key, default=None):
+        if key in FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def to_dict(self) -> dict:
+        data = {key: getattr(self, key) for key in FIELDS}
+        data['attachments'] = [dict(att) for att in self.attachments]
+        data['keywords'] = list(self.keywords)
+        return data
+
+    def __repr__(self):
+        return f"PromoRecord(id={self.id!r}, title={self.title!r})"
+
+
+class SearchHit:
+    """Search result: a record plus its highlight markup, without copying the record."""
+    __slots__ = ('record', 'highlight')
+
+    def __init__(self, record: PromoRecord, highlight: dict):
+        self.record = record
+        self.highlight = highlight
+
+    def __getattr__(self, name):
+        if name == 'record':
+            raise AttributeError(name)
+        return getattr(self.record, name)
+
+    def get(self, key, default=None):
+        if key == 'highlight':
+            return self.highlight
+        return self.record.get(key, default)
+
+    def __getitem__(self, key):
+        if key == 'highlight':
+            return self.highlight
+        return self.record[key]
+
+    def __contains__(self, key):
+        return key == 'highlight' or key in self.record
+
+    def to_dict(self) -> dict:
+        data = self.record.to_dict()
+        data['highlight'] = self.highlight
+        return data
+
+    def __repr__(self):
+        return f"SearchHit(id={self.record.id!r}, title={self.record.title!r})"
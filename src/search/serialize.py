@@ -0,0 +1,82 @@
+"""
+JSON encoding for the search and promotions APIs.
+Responses can be projected to a subset of fields (?fields=id,title,duration,link),
+and each promotion's encoded bytes are cached per (id, data version, fields, day),
+so a response is mostly a join of cached bytes. Uses orjson when installed,
+otherwise the stdlib json module (compact separators, UTF-8).
+"""
+import json
+from datetime import date
+
+from src.search.cache import LRUCache
+from src.search.records import FIELDS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fields a search hit can be projected to
+HIT_FIELDS = FIELDS + ('highlight',)
+ENCODED_CACHE_SIZE = 4096
+
+encoded_cache = LRUCache(maxsize=ENCODED_CACHE_SIZE)
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def parse_fields(value: str, allowed=FIELDS):
+    """
+    Fields named in a comma-separated ?fields= value, in allowed order.
+    None (every field) if value is empty or names no known field.
+    """
+    if not value:
+        return None
+    wanted = {field.strip() for field in value.split(',')}
+    return tuple(field for field in allowed if field in wanted) or None
+
+
+def _project(promo, fields) -> dict:
+    if fields is None:
+        return promo.to_dict() if hasattr(promo, 'to_dict') else promo
+    return {field: promo.get(field) for field in fields}
+
+
+def encode_promotion(promo, version, fields=None) -> bytes:
+    """
+    Encoded JSON object of a PromoRecord (or promotion dict) projected to fields.
+    Cached per data version; the day is part of the key because duration
+    ("เหลือเวลาอีก N วัน") is computed from today's date.
+    """
+    key = (promo.get('id'), version, fields, date.today().toordinal())
+    data = encoded_cache.get(key)
+    if data is None:
+        data = dumps(_project(promo, fields))
+        encoded_cache.put(key, data)
+    return data
+
+
+def encode_hit(hit, version, fields=None) -> bytes:
+    """encode_promotion for a SearchHit, with its (per-query, uncached) highlight."""
+    highlight = getattr(hit, 'highlight', None)
+    if fields is not None:
+        if 'highlight' in fields:
+            fields = tuple(field for field in fields if field != 'highlight')
+        else:
+            highlight = None
+    data = encode_promotion(getattr(hit, 'record', hit), version, fields)
+    if highlight is None:
+        return data
+    separator = b'' if data == b'{}' else b','
+    return data[:-1] + separator + b'"highlight":' + dumps(highlight) + b'}'
+
+
+def encode_response(envelope: dict, items: list) -> bytes:
+    """envelope encoded with "data": the already encoded items, as the last key."""
+    head = dumps(envelope)
+    separator = b'' if head == b'{}' else b','
+    return head[:-1] + separator + b'"data":[' + b','.join(items) + b']}'
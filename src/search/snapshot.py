@@ -0,0 +1,167 @@
+"""
+Point-in-time view of the active promotions and everything built from them
+(index, BM25 statistics, expiry heap). SearchEngine builds a new snapshot off
+to the side and publishes it with one reference assignment, so a search that
+picked up a snapshot keeps a consistent view while the next one is built.
+A published snapshot is never modified (apart from a memo of the documents
+that have expired, see expired()).
+
+Snapshots can also be saved to a binary file at sync time (pickled, with a
+header naming the source promotions.json and the index settings), so a cold
+start loads the ready-to-serve state instead of parsing and indexing the JSON.
+The file is only read if it was built from the same JSON bytes, format, year
+and settings; it is trusted data written by our own sync, never user input.
+"""
+import hashlib
+import heapq
+import math
+import os
+import pickle
+import struct
+
+from src.search.bm25 import BM25Scorer
+from src.search.facets import to_bits
+from src.search.index import NgramIndex
+
+# Bump when any pickled structure (records, index, scorer) changes shape
+SNAPSHOT_FORMAT = 6
+SNAPSHOT_MAGIC = b"PROMOSNP"
+# magic, format, year the expiry filter ran in, sha1 of the source promotions.json,
+# sha1 of the index settings (see src.search.engine.index_config_digest)
+_HEADER = struct.Struct(">8sHH20s20s")
+
+
+def source_digest(data: bytes) -> bytes:
+    return hashlib.sha1(data).digest()
+
+
+class SearchSnapshot:
+    def __init__(self, promotions: list, index: NgramIndex, expiry_heap: list, version: int):
+        self.promotions = promotions
+        # id -> record, for get_by_id (the first one wins if an id repeats)
+        self.by_id = {r.id: r for r in reversed(promotions)}
+        self.index = index
+        self.scorer = BM25Scorer(index)
+        # Min-heap of (expires_at, doc): promotions leave the live set as time passes
+        self.expiry_heap = expiry_heap
+        self.version = version
+        # (computed at, next expiry after it, docs, bitset) - see expired()
+        self._expired = None
+
+    @classmethod
+    def build(cls, promotions: list, version: int, stop_words=()):
+        index = NgramIndex(promotions, stop_words)
+        heap = [(r.expires_at, doc) for doc, r in enumerate(promotions) if r.expires_at is not None]
+        heapq.heapify(heap)
+        return cls(promotions, index, heap, version)
+
+    def next_expiry(self):
+        """Epoch of the next end_date still in this snapshot, None if there is none."""
+        return self.expiry_heap[0][0] if self.expiry_heap else None
+
+    def expired(self, now: float):
+        """
+        (docs, bitset) of the documents whose end_date passed by now. Searches
+        leave them out until expire() publishes a snapshot without them; the
+        answer is memoized until the next end_date in the heap.
+        """
+        next_expiry = self.next_expiry()
+        if next_expiry is None or next_expiry > now:
+            return frozenset(), 0
+        cached = self._expired
+        if cached is not None and cached[0] <= now < cached[1]:
+            return cached[2], cached[3]
+
+        # Walk the heap from the root, skipping subtrees that are not due yet
+        heap = self.expiry_heap
+        docs, next_due, stack = set(), math.inf, [0]
+        while stack:
+            i = stack.pop()
+            expires_at, doc = heap[i]
+            if expires_at > now:
+                next_due = min(next_due, expires_at)
+                continue
+            docs.add(doc)
+            stack.extend(child for child in (2 * i + 1, 2 * i + 2) if child < len(heap))
+        docs = frozenset(docs)
+        bits = to_bits(docs)
+        self._expired = (now, next_due, docs, bits)
+        return docs, bits
+
+    def expire(self, now: float, version: int):
+        """New snapshot without the promotions that ended by now, None if nothing is due."""
+        if not self.expiry_heap or self.expiry_heap[0][0] > now:
+            return None
+
+        heap = list(self.expiry_heap)
+        index = self.index.copy()
+        removed = set()
+        while heap and heap[0][0] <= now:
+            _, doc = heapq.heappop(heap)
+            if index.records[doc] is not None:
+                removed.add(index.records[doc])
+                index.remove(doc)
+        promotions = [r for r in self.promotions if r not in removed]
+        return SearchSnapshot(promotions, index, heap, version)
+
+    def apply(self, upserts: list, removed_ids, version: int):
+        """
+        New snapshot with records added or replaced (upserts, matched by id) and
+        removed_ids dropped. Only those documents are indexed again; upserts
+        come first in promotions, like a freshly synced file.
+        """
+        index = self.index.copy()
+        heap = list(self.expiry_heap)
+        touched = {r.id for r in upserts} | set(removed_ids)
+        for doc, record in enumerate(index.records):
+            if record is not None and record.id in touched:
+                index.remove(doc)
+
+        for record in upserts:
+            doc = index.add(record)
+            if record.expires_at is not None:
+                heapq.heappush(heap, (record.expires_at, doc))
+
+        promotions = list(upserts) + [r for r in self.promotions if r.id not in touched]
+        return SearchSnapshot(promotions, index, heap, version)
+
+
+def save_snapshot(snapshot: SearchSnapshot, path, digest: bytes, year: int, config: bytes):
+    """Write snapshot to path (temp file + rename)."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, year, digest, config))
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def _read_header(data: bytes):
+    if len(data) < _HEADER.size:
+        return None
+    return _HEADER.unpack_from(data)
+
+
+def snapshot_matches(path, digest: bytes, year: int, config: bytes) -> bool:
+    """Whether the snapshot file at path was built from digest, in this format, year and config."""
+    try:
+        with open(path, "rb") as f:
+            header = _read_header(f.read(_HEADER.size))
+    except OSError:
+        return False
+    return header == (SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, year, digest, config)
+
+
+def load_snapshot(path, digest: bytes, year: int, config: bytes):
+    """Snapshot saved from the same source digest, format, year and config; None if missing or stale."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if _read_header(data) != (SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, year, digest, config):
+        return None
+    try:
+        return pickle.loads(memoryview(data)[_HEADER.size:])
+    except Exception:
+        # e.g. written by an incompatible numpy/Python version
+        return None
@@ -0,0 +1,118 @@
+"""
+Cached bearer token for the upstream promotions API.
+One TokenManager per process holds the token with its expiry and a stable
+device id, so callers do not log in before every fetch. Concurrent cache
+misses wait for a single login; the token can be persisted to a file so a
+warm restart reuses it.
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Refresh this many seconds before the token expires
+REFRESH_MARGIN = 60
+# Lifetime assumed when the login response carries no expiry
+DEFAULT_TTL = 3600
+
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    """exp claim of a JWT, None if token is not a JWT."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp else None
+    except (IndexError, ValueError, AttributeError, TypeError):
+        return None
+
+
+class TokenManager:
+    def __init__(self, request_login: Callable[[str], Optional[dict]], cache_file: str = None,
+                 device_uuid: str = None):
+        """
+        request_login(device_uuid) posts the login and returns the response's
+        "data" object (None on failure). cache_file optionally persists the token.
+        """
+        self._request_login = request_login
+        self.cache_file = cache_file
+        self.token = None
+        self.expires_at = 0.0
+        self.device_uuid = device_uuid
+        self.logins = 0
+        self._lock = threading.Lock()
+        self._load()
+        if not self.device_uuid:
+            self.device_uuid = str(uuid.uuid4())
+
+    def _valid(self, now: float) -> bool:
+        return bool(self.token) and now < self.expires_at - REFRESH_MARGIN
+
+    def get_token(self) -> Optional[str]:
+        """Cached token, logging in (once, for all waiting callers) when missing or about to expire."""
+        if self._valid(time.time()):
+            return self.token
+        with self._lock:
+            # Another caller may have logged in while we waited
+            now = time.time()
+            if self._valid(now):
+                return self.token
+            data = self._request_login(self.device_uuid)
+            self.logins += 1
+            if not data:
+                return None
+            token = data.get("access_token") or data.get("accessToken")
+            if not token:
+                return None
+            expires_in = data.get("expires_in") or data.get("expiresIn")
+            self.token = token
+            self.expires_at = _jwt_expiry(token) or (now + float(expires_in or DEFAULT_TTL))
+            self._save()
+            return token
+
+    async def get_token_async(self) -> Optional[str]:
+        """get_token for async callers; only a cache miss leaves the event loop."""
+        if self._valid(time.time()):
+            return self.token
+        return await asyncio.to_thread(self.get_token)
+
+    def invalidate(self, token: str = None):
+        """
+        Forget the token after the API rejected it (401). Passing the rejected
+        token makes a burst of 401s for the same token invalidate it only once.
+        """
+        with self._lock:
+            if token is None or token == self.token:
+                self.token = None
+                self.expires_at = 0.0
+
+    def _load(self):
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.device_uuid = self.device_uuid or cached.get("device_uuid")
+        self.token = cached.get("token")
+        self.expires_at = float(cached.get("expires_at") or 0)
+
+    def _save(self):
+        if not self.cache_file:
+            return
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"token": self.token, "expires_at": self.expires_at, "device_uuid": self.device_uuid}, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Could not persist token cache: {e}")
@@ -0,0 +1,34 @@
+"""
+Date helpers shared by ingestion and the search engine.
+"""
+from datetime import datetime
+from typing import Optional
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    """Parse an API date ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS'), None if missing or invalid."""
+    if not value:
+        return None
+    value = str(value).strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    try:
+        return datetime.strptime(value.split()[0], "%Y-%m-%d")
+    except (ValueError, IndexError):
+        return None
+
+
+def duration_text(end: Optional[datetime], now: Optional[datetime] = None) -> str:
+    """Remaining time text shown for a promotion ending at end."""
+    if end is None:
+        return ""
+    now = now or datetime.now()
+    days_left = (end.date() - now.date()).days
+    if days_left > 0:
+        return f"เหลือเวลาอีก {days_left} วัน"
+    elif days_left == 0:
+        return "วันนี้วันสุดท้าย"
+    return "หมดอายุแล้ว"
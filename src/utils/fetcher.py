@@ -2,69 +2,203 @@
 Centralized module for fetching promotions from external API.
 """
 import os
-import uuid
+import random
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 
 try:
     import httpx
 except ImportError:
     httpx = None
 
+from src.utils.auth import TokenManager
+
 # Configuration
-LOGIN_URL = "https://api.vrcomseven.com/users/web_login"
-PROMOTIONS_URL = "https://api.vrcomseven.com/v1/promotions"
+API_BASE = os.environ.get("VR_API_BASE", "https://api.vrcomseven.com").rstrip("/")
+LOGIN_URL = f"{API_BASE}/users/web_login"
+PROMOTIONS_URL = f"{API_BASE}/v1/promotions"
 USERNAME = os.environ.get("VR_USERNAME", "25622")
 PASSWORD = os.environ.get("VR_PASSWORD", "91544")
 
+# Paging: pages after the first are fetched concurrently, at most FETCH_CONCURRENCY at once
+PER_PAGE = 200
+FETCH_CONCURRENCY = int(os.environ.get("FETCH_CONCURRENCY", "4"))
+# Transient failures (network errors, 429, 5xx) are retried with jittered exponential backoff
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+
+# One pooled AsyncClient per event loop (httpx clients cannot be shared across loops)
+_async_clients = {}
+
 logger = logging.getLogger(__name__)
 
-def login() -> Optional[str]:
-    """Login via API and return access token."""
-    if not httpx:
-        logger.error("httpx module not found")
-        return None
-        
+def _request_login(device_uuid: str) -> Optional[Dict[str, Any]]:
+    """POST the login form and return the response's data object."""
     try:
         response = httpx.post(
             LOGIN_URL,
             json={
                 "emp_code": USERNAME,
                 "pass": PASSWORD,
-                "device_uuid": str(uuid.uuid4()),
+                "device_uuid": device_uuid,
                 "platform": "web"
             },
             headers={"Content-Type": "application/json"},
             timeout=30
         )
         if response.status_code == 200:
-            data = response.json()
-            token_data = data.get("data", {})
-            # Handle different key names if API changes
-            token = token_data.get("access_token") or token_data.get("accessToken")
-            return token
+            return response.json().get("data") or {}
         logger.error(f"Login failed: {response.status_code} {response.text}")
         return None
     except Exception as e:
         logger.error(f"Login exception: {str(e)}")
         return None
 
+# Process-wide token cache; set VR_TOKEN_CACHE to a file path to reuse the token after a restart
+token_manager = TokenManager(_request_login, cache_file=os.environ.get("VR_TOKEN_CACHE") or None,
+                             device_uuid=os.environ.get("VR_DEVICE_UUID") or None)
+
+def login() -> Optional[str]:
+    """Return an access token, logging in only when the cached one is missing or expiring."""
+    if not httpx:
+        logger.error("httpx module not found")
+        return None
+    return token_manager.get_token()
+
+def get_async_client() -> "httpx.AsyncClient":
+    """Shared keep-alive AsyncClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60, connect=10),
+            limits=httpx.Limits(max_connections=FETCH_CONCURRENCY * 2, max_keepalive_connections=FETCH_CONCURRENCY),
+        )
+        _async_clients[loop] = client
+    return client
+
+async def close_async_client():
+    """Close the running loop's shared client (call before the loop shuts down)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def run_async(coro):
+    """Run coro from synchronous code on a fresh event loop, closing its client afterwards."""
+    async def runner():
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+    return asyncio.run(runner())
+
+async def fetch_page(client: "httpx.AsyncClient", token: str, page: int, perpage: int = PER_PAGE,
+                     validators: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one page of the promotions feed (newest updated_at first), with retries and re-login on 401.
+    With validators ({"etag", "last_modified"} from the previous fetch) the request is
+    conditional: returns None on 304 Not Modified, otherwise stores the new validators.
+    """
+    error = None
+    conditional = {}
+    if validators:
+        if validators.get("etag"):
+            conditional["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            conditional["If-Modified-Since"] = validators["last_modified"]
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(BACKOFF_BASE * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        try:
+            response = await client.get(
+                PROMOTIONS_URL,
+                params={
+                    "page": page,
+                    "perpage": perpage,
+                    "sort_by": "updated_at",
+                    "sort_direction": "desc",
+                    "business_units": "Apple",
+                },
+                headers={"Authorization": f"Bearer {token}", **conditional},
+            )
+        except httpx.TransportError as e:
+            error = str(e) or type(e).__name__
+            continue
+        if response.status_code == 304 and conditional:
+            return None
+        if response.status_code == 200:
+            if validators is not None:
+                validators["etag"] = response.headers.get("ETag")
+                validators["last_modified"] = response.headers.get("Last-Modified")
+            return response.json()
+        error = f"{response.status_code} {response.text[:200]}"
+        if response.status_code == 401:
+            # Token expired or revoked: log in again (once for all pages) and retry
+            token_manager.invalidate(token)
+            new_token = await token_manager.get_token_async()
+            if new_token and new_token != token:
+                token = new_token
+                continue
+            break
+        if response.status_code != 429 and response.status_code < 500:
+            break
+    raise RuntimeError(f"Fetch failed on page {page}: {error}")
+
+async def stream_promotions(token: str, concurrency: int = FETCH_CONCURRENCY, perpage: int = PER_PAGE,
+                            client: "httpx.AsyncClient" = None,
+                            validators: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield raw promotions in feed order. Page 1 gives meta.last_page, the other
+    pages are fetched concurrently. Pages not yet needed are cancelled when
+    the caller stops iterating (close the generator with aclose()).
+    validators makes page 1 conditional (see fetch_page); on 304 nothing is
+    yielded and validators["not_modified"] is set.
+    """
+    if not httpx:
+        raise RuntimeError("httpx module not found")
+    client = client or get_async_client()
+
+    first = await fetch_page(client, token, 1, perpage, validators)
+    if first is None:
+        validators["not_modified"] = True
+        return
+    for record in first.get("data") or []:
+        yield record
+    last_page = (first.get("meta") or {}).get("last_page", 1)
+    if not first.get("data") or last_page <= 1:
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(page):
+        async with semaphore:
+            return await fetch_page(client, token, page, perpage)
+
+    tasks = [asyncio.ensure_future(fetch(page)) for page in range(2, last_page + 1)]
+    try:
+        for task in tasks:
+            records = (await task).get("data") or []
+            if not records:
+                return
+            for record in records:
+                yield record
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+async def fetch_all_promotions(token: str, **kwargs) -> List[Dict[str, Any]]:
+    """All raw promotions, every page."""
+    return [record async for record in stream_promotions(token, **kwargs)]
+
 def fetch_promotions_data(token: str) -> List[Dict[str, Any]]:
-    """Fetch raw promotions data using access token."""
+    """Fetch raw promotions data (all pages) using access token."""
     if not httpx:
         return []
         
     try:
-        response = httpx.get(
-            f"{PROMOTIONS_URL}?perpage=200&sort_by=updated_at&sort_direction=desc&business_units=Apple",
-            headers={"Authorization": f"Bearer {token}"},
-            timeout=60
-        )
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("data", [])
-        logger.error(f"Fetch failed: {response.status_code} {response.text}")
-        return []
+        return run_async(fetch_all_promotions(token))
     except Exception as e:
         logger.error(f"Fetch exception: {str(e)}")
         return []
@@ -0,0 +1,77 @@
+"""
+Cold-start helpers: per-phase startup timings and lazily created singletons.
+Each phase is recorded once per process (the first time it runs), so the
+numbers describe the cold start. Set STARTUP_TIMINGS=1 to print them as they
+are recorded; timings() returns them for a status endpoint.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PRINT_TIMINGS = os.environ.get("STARTUP_TIMINGS", "") not in ("", "0")
+# "lazy" (default): the search engine and API clients are created on first use.
+# "eager": they are created while the app module is imported.
+STARTUP_MODE = os.environ.get("STARTUP_MODE", "lazy")
+
+_started = time.perf_counter()
+# phase -> seconds, in the order recorded
+_timings = {}
+
+
+def record(name: str, seconds: float):
+    if name in _timings:
+        return
+    _timings[name] = seconds
+    if PRINT_TIMINGS:
+        print(f"[startup] {name}: {seconds * 1000:.1f} ms")
+
+
+@contextmanager
+def phase(name: str):
+    """Time the block as startup phase name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def mark(name: str):
+    """Record the time elapsed since this module was first imported."""
+    record(name, time.perf_counter() - _started)
+
+
+def timings() -> dict:
+    """Recorded phases in milliseconds."""
+    return {name: round(seconds * 1000, 1) for name, seconds in _timings.items()}
+
+
+class Lazy:
+    """
+    Value created by factory() on first use, once even with concurrent callers.
+    Attribute access is forwarded, so a Lazy can stand in for the object itself.
+    """
+
+    def __init__(self, name: str, factory):
+        self.name = name
+        self._factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        value = self._value
+        if value is None:
+            with self._lock:
+                if self._value is None:
+                    with phase(self.name):
+                        self._value = self._factory()
+                value = self._value
+        return value
+
+    @property
+    def created(self) -> bool:
+        return self._value is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
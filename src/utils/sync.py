@@ -0,0 +1,182 @@
+"""
+Delta sync of promotions.json with the promotions API.
+The feed is sorted by updated_at (newest first), so a sync only pages until
+it reaches records older than the last sync's high-water mark. Each raw
+record is hashed, so only new or changed records are processed again, and
+promotions.json is rewritten only when something changed. Page 1 is
+requested with the last ETag/Last-Modified, so an unchanged feed costs one
+304 when the upstream supports it.
+Sync state (high-water mark, per-record hashes, validators, last sync
+time) is kept next to the data file in promotions.sync.json. The hashes only
+cover the raw records, so the state also records PROCESSING_VERSION; when it
+changes, the next sync is a full one that processes every record again.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from src.utils.fetcher import run_async, stream_promotions
+
+logger = logging.getLogger(__name__)
+
+# Deletions on the server are only visible when the whole feed is read,
+# so a full sync is done at least this often (seconds)
+FULL_SYNC_INTERVAL = float(os.environ.get("FULL_SYNC_INTERVAL", str(24 * 3600)))
+# Bump when process_promotions output changes for the same raw record
+# (keywords, duration text, new fields...), so stored records get rebuilt
+PROCESSING_VERSION = 2
+
+
+def record_hash(raw: dict) -> str:
+    """Content hash of one raw API record."""
+    payload = json.dumps(raw, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def state_path(data_file) -> Path:
+    data_file = Path(data_file)
+    return data_file.with_name(f"{data_file.stem}.sync.json")
+
+
+def load_state(data_file) -> dict:
+    try:
+        with open(state_path(data_file), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def last_synced(data_file) -> float:
+    """Time of the last successful sync (even one that changed nothing), else the file's mtime."""
+    synced_at = load_state(data_file).get("synced_at")
+    if synced_at:
+        return synced_at
+    return os.path.getmtime(data_file) if os.path.exists(data_file) else 0.0
+
+
+def write_json(path, data, **kwargs):
+    """Write JSON to a temp file and rename it, so readers never see a partial file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp, path)
+
+
+def sync_promotions(token: str, data_file, process: Callable[[list], list], full: Optional[bool] = None) -> Dict:
+    """Synchronous wrapper of sync_promotions_async (runs its own event loop)."""
+    return run_async(sync_promotions_async(token, data_file, process, full))
+
+
+async def sync_promotions_async(token: str, data_file, process: Callable[[list], list],
+                                full: Optional[bool] = None, **fetch_options) -> Dict:
+    """
+    Bring data_file up to date with the API and return the delta:
+    {"added", "changed", "removed": lists of ids, "upserts": processed records
+    for added/changed ids, "fetched": raw records read, "full": bool,
+    "not_modified": True when the upstream answered 304}.
+    process turns raw API records into promotions.json records;
+    fetch_options are passed to stream_promotions (concurrency, client, ...).
+    """
+    state = load_state(data_file)
+    if state and state.get("processing_version") != PROCESSING_VERSION:
+        # Records were processed by older code: reprocess everything, no 304 shortcut
+        logger.info("Sync: processing version changed, doing a full resync")
+        state, full = {}, True
+    hashes = state.get("hashes", {})
+    high_water = state.get("high_water")
+    now = time.time()
+    if full is None:
+        full = not high_water or now - state.get("full_synced_at", 0) > FULL_SYNC_INTERVAL
+
+    try:
+        with open(data_file, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored, full = [], True
+    stored_ids = {str(p.get("id")) for p in stored}
+
+    # Read the feed until records are older than the last seen updated_at.
+    # Page 1 is a conditional request: 304 means nothing changed anywhere in the feed
+    validators = {"etag": state.get("etag"), "last_modified": state.get("last_modified")} if stored else {}
+    fetched = []
+    stream = stream_promotions(token, validators=validators, **fetch_options)
+    try:
+        async for raw in stream:
+            updated_at = raw.get("updated_at")
+            if not full and updated_at and updated_at < high_water:
+                break
+            fetched.append(raw)
+    finally:
+        await stream.aclose()
+
+    if validators.get("not_modified"):
+        state["synced_at"] = now
+        if full:
+            state["full_synced_at"] = now
+        write_json(state_path(data_file), state)
+        logger.info("Sync: feed not modified, nothing to process")
+        return {"added": [], "changed": [], "removed": [], "upserts": [], "fetched": 0, "full": full,
+                "not_modified": True}
+
+    new_hashes = {}
+    pending = []
+    changed_keys = set()
+    for raw in fetched:
+        key = str(raw.get("id"))
+        if key in new_hashes:
+            continue
+        digest = new_hashes[key] = record_hash(raw)
+        if hashes.get(key) != digest:
+            pending.append(raw)
+            changed_keys.add(key)
+
+    upserts = process(pending) if pending else []
+    upsert_keys = {str(p.get("id")) for p in upserts}
+    added = [p.get("id") for p in upserts if str(p.get("id")) not in stored_ids]
+    changed = [p.get("id") for p in upserts if str(p.get("id")) in stored_ids]
+
+    # Stored records that are gone from the feed (full sync only) or now filtered out
+    gone = (changed_keys - upsert_keys) | (stored_ids - set(new_hashes) if full else set())
+    removed = [p.get("id") for p in stored if str(p.get("id")) in gone]
+
+    # Unchanged feed: no processing happened and promotions.json (and its mtime) stays as is
+    if upserts or removed:
+        touched = upsert_keys | gone
+        # Newly updated records go first, same order as the feed (updated_at desc)
+        promotions = upserts + [p for p in stored if str(p.get("id")) not in touched]
+        write_json(data_file, promotions, indent=2)
+
+    if full:
+        hashes = new_hashes
+    else:
+        hashes.update(new_hashes)
+    marks = [raw.get("updated_at") for raw in fetched if raw.get("updated_at")]
+    if high_water:
+        marks.append(high_water)
+    write_json(state_path(data_file), {
+        "processing_version": PROCESSING_VERSION,
+        "high_water": max(marks) if marks else None,
+        "hashes": hashes,
+        "synced_at": now,
+        "full_synced_at": now if full else state.get("full_synced_at", 0),
+        "etag": validators.get("etag"),
+        "last_modified": validators.get("last_modified"),
+    })
+
+    logger.info(f"Sync ({'full' if full else 'delta'}): fetched {len(fetched)}, "
+                f"{len(added)} added, {len(changed)} changed, {len(removed)} removed")
+    return {
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+        "upserts": upserts,
+        "fetched": len(fetched),
+        "full": full,
+        "not_modified": False,
+    }
@@ -0,0 +1,219 @@
+"""
+Offline Thai text normalization and word segmentation.
+Thai promotion titles are written without spaces, so text is segmented with
+a dictionary trie using maximal matching (fewest unknown characters, then
+fewest words). Used once at ingest for keywords and when building the
+search index, so queries can be matched as exact tokens.
+"""
+import re
+from typing import Iterable, List
+
+# Tone marks (่ ้ ๊ ๋) and mai taikhu (็) are dropped when normalizing:
+# spellings like ซัมซุง/ซัมซุ่ง and โน๊ตบุ๊ค/โน้ตบุ๊ค then become the same token
+_TONE_MARKS = dict.fromkeys(map(ord, '็่้๊๋'))
+_ZERO_WIDTH = dict.fromkeys(map(ord, '​‌‍﻿'))
+_DROP_CHARS = {**_TONE_MARKS, **_ZERO_WIDTH}
+
+# Marks that attach to the previous character - never a word boundary before them
+_COMBINING = set('ัำิีึืฺุูๅ็่้๊๋์ํ๎')
+# Leading vowels - never a word boundary right after them
+_LEADING_VOWELS = set('เแโใไ')
+
+# Thai abbreviations (ก.พ., ม.ค.), Thai runs, and latin/number runs (0%, ps5)
+_TOKEN_RE = re.compile(r'[ก-ฮ]\.(?:[ก-ฮ]\.)+|[ก-๎]+|[a-z0-9]+%?')
+
+# Base vocabulary: common words in promotion titles/descriptions, brands and banks in Thai
+THAI_WORDS = """
+กด กรกฎา กรกฎาคม กรณี กระเป๋า กรุงเทพ กรุงไทย กรุงศรี กรุงศรีอยุธยา กล่อง กสิกร กสิกรไทย กับ กันยา กันยายน
+กำหนด กุมภา กุมภาพันธ์ เกม เกมมิ่ง แก้ไข ก่อน
+ขยาย ขนาด ของ ของแถม ของรางวัล ขอ ขั้นตอน ขาย ขึ้น ขึ้นไป เข้าร่วม ข้อมูล
+คะแนน ค่า ค่าคอม ค่าเครื่อง คำนวณ คำสั่งซื้อ คืน คู่มือ คูปอง เคส เครดิต เครือข่าย เครื่อง เครื่องปริ้น เครื่องพิมพ์
+เคลม แคนนอน แคนอน แคมเปญ แคชพลัส โค้ด
+งาน เงิน เงินคืน เงินสด เงื่อนไข
+จาก จ่าย จำกัด จำนวน จำหน่าย จุด จุดขาย เจ้าหน้าที่ แจก แจ้ง
+ฉบับ เฉพาะ
+ช่อง ช่องทาง ช่วง ชำระ ชิ้น ชื่อ ชุด ช้อป ใช้ ใช้งาน ใช้จ่าย
+ซัมซุง ซื้อ เซต เซลล์ เซลส์ ไซส์
+ดอกเบี้ย ด้วย ดาวน์โหลด ดีแทค ดู เดลล์ เดือน เดียว
+ตรวจสอบ ตรา ต่อ ตั้งแต่ ตาม ตาราง ตุลา ตุลาคม ตัว ตัวโชว์ ตัวอย่าง ต้อง
+ถาวร ถึง
+ทดสอบ ทรู ทั้ง ทั้งหมด ทันที ทาง ที่ ทีทีบี ทีม ทีเอ็มบี ทุก ทุกรุ่น ทุกสาขา เท่า เท่านั้น แท้
+ธนาคาร ธันวา ธันวาคม
+นาฬิกา นาน น่ารัก นี้ แนบ แนะนำ แนวตั้ง แนวนอน โน๊ตบุ๊ค
+บัตร บัตรเครดิต บาท บิล บน บริการ บริษัท เบอร์ แบ่ง แบรนด์ ใบ ใบเสร็จ
+ประกัน ประกาศ ประจำ ประจำเดือน ปรับ ปรับราคา ปริ้น ปริ้นเตอร์ ปลอด ปกติ ปุ่ม ป้าย
+ผ่อน ผ่าน ผ่อนชำระ ผิด ผูก
+ฝ่าย
+พร้อม พฤศจิกา พฤศจิกายน พฤษภา พฤษภาคม พัดลม พิมพ์ พิเศษ เพิ่ม เพียง เพลย์สเตชั่น แพ็ค แพคเกจ แพกเกจ แพ็กเกจ
+ฟรี ฟังก์ชั่น ฟิล์ม ไฟล์
+ภายใน ภาพ
+มกรา มกราคม มาใหม่ มิถุนา มิถุนายน มีนา มีนาคม มีผล มือถือ มูลค่า เมษา เมษายน เมื่อ แม็ค แมค แม็คบุ๊ค ไมโครซอฟท์
+ยกเลิก ยอด ยิง ยี่ห้อ ยูโอบี
+รวม ระบบ ระยะเวลา รับ ราคา ราคาพิเศษ รายการ รายละเอียด ร้าน รุ่น รูด เริ่ม เรื่อง
+ลด ลดราคา ลงทะเบียน ลูกค้า ลำโพง เลือก เลโนโว่ เลอโนโว
+วัน วันที่ วิธี วิธีการ วอช
+ศูนย์ ศูนย์บริการ
+ส่ง ส่งเสริม ส่วนลด สมาร์ทวอช สาขา สามารถ สาย สายชาร์จ สิงหา สิงหาคม สิทธิ์ สินค้า สื่อ สูงสุด เสียง แสดง
+หน้า หน้าจอ หน้าร้าน หมด หมดอายุ หมายเหตุ หรือ หลัง หูฟัง เหลือ
+อัปเดต อัพเดท อินเซนทีฟ อิออน อื่น เอชพี เอซุส อัสซุส เอปสัน เอไอเอส เอเซอร์ แอปเปิล แอปเปิ้ล แอร์พอด แอร์พ็อด ออนไลน์
+ไอแพด ไอโฟน
+ฮีโร่
+โปร โปรโมชั่น โปรโมชัน ไทยพาณิชย์ เคทีซี
+ก็ ครับ ค่ะ จะ แต่ นะ ได้ ไป มา มี ยัง เลย ว่า แล้ว อยู่ ให้ ใน เป็น เปิด ไม่ และ
+""".split()
+
+
+def normalize(text: str) -> str:
+    """Lowercase and fold Thai spelling variants (tone marks, zero-width chars, ํา, เเ)."""
+    if not text:
+        return ''
+    return text.lower().replace('ํา', 'ำ').replace('เเ', 'แ').translate(_DROP_CHARS)
+
+
+def normalize_with_offsets(text: str):
+    """
+    normalize() that also maps positions back to text.
+    Returns (normalized, starts, ends): normalized[i] comes from text[starts[i]:ends[i]],
+    where ends[i] also covers marks dropped right after it.
+    """
+    chars, starts, ends = [], [], []
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+        if ord(char) in _DROP_CHARS:
+            i += 1
+            continue
+        pair = text[i:i + 2]
+        if pair == 'ํา' or pair == 'เเ':
+            folded, width = ('ำ' if pair == 'ํา' else 'แ'), 2
+        else:
+            folded, width = char.lower(), 1
+        for out in folded:
+            chars.append(out)
+            starts.append(i)
+            ends.append(i + width)
+        i += width
+
+    # Extend each character over marks dropped after it
+    for k in range(len(chars) - 1):
+        if starts[k + 1] > ends[k]:
+            ends[k] = starts[k + 1]
+    if chars:
+        ends[-1] = n
+    return ''.join(chars), starts, ends
+
+
+class _TrieNode:
+    __slots__ = ('children', 'is_word')
+
+    def __init__(self):
+        self.children = {}
+        self.is_word = False
+
+
+class ThaiSegmenter:
+    def __init__(self, words: Iterable[str] = ()):
+        self.root = _TrieNode()
+        self.add_words(THAI_WORDS)
+        self.add_words(words)
+
+    def add_words(self, words: Iterable[str]):
+        for word in words:
+            word = normalize(word)
+            if not word:
+                continue
+            node = self.root
+            for char in word:
+                node = node.children.setdefault(char, _TrieNode())
+            node.is_word = True
+
+    @staticmethod
+    def _can_break(text: str, pos: int) -> bool:
+        """Whether a word may end right before position pos."""
+        if pos >= len(text):
+            return True
+        return text[pos] not in _COMBINING and text[pos - 1] not in _LEADING_VOWELS
+
+    def segment_run(self, text: str) -> List[str]:
+        """Segment one normalized run of Thai characters."""
+        n = len(text)
+        # best[i] = (unknown chars, word count, previous position, is dictionary word) for text[:i]
+        best = [None] * (n + 1)
+        best[0] = (0, 0, -1, True)
+
+        for start in range(n):
+            if best[start] is None:
+                continue
+            unknown, count, _, _ = best[start]
+
+            # Dictionary words starting here
+            node = self.root
+            for end in range(start, n):
+                node = node.children.get(text[end])
+                if node is None:
+                    break
+                if node.is_word and self._can_break(text, end + 1):
+                    candidate = (unknown, count + 1, start, True)
+                    if best[end + 1] is None or candidate[:2] < best[end + 1][:2]:
+                        best[end + 1] = candidate
+
+            # Or one unknown character cluster
+            end = start + 1
+            while not self._can_break(text, end):
+                end += 1
+            candidate = (unknown + end - start, count + 1, start, False)
+            if best[end] is None or candidate[:2] < best[end][:2]:
+                best[end] = candidate
+
+        # Walk back, merging consecutive unknown clusters into one token
+        pieces = []
+        pos = n
+        while pos > 0:
+            _, _, start, is_word = best[pos]
+            pieces.append((start, pos, is_word))
+            pos = start
+        pieces.reverse()
+
+        tokens = []
+        pending = None
+        for start, end, is_word in pieces:
+            if is_word:
+                if pending is not None:
+                    tokens.append(text[pending:start])
+                    pending = None
+                tokens.append(text[start:end])
+            elif pending is None:
+                pending = start
+        if pending is not None:
+            tokens.append(text[pending:])
+        return tokens
+
+    def segment(self, text: str) -> List[str]:
+        """Tokens of already normalized text."""
+        tokens = []
+        for match in _TOKEN_RE.finditer(text):
+            token = match.group(0)
+            if 'ก' <= token[0] <= '๎' and '.' not in token:
+                tokens.extend(self.segment_run(token))
+            else:
+                tokens.append(token)
+        return tokens
+
+    def tokenize(self, text: str) -> List[str]:
+        """Normalize and segment text."""
+        return self.segment(normalize(text))
+
+
+_default = None
+
+
+def get_segmenter() -> ThaiSegmenter:
+    """Shared segmenter with the base vocabulary."""
+    global _default
+    if _default is None:
+        _default = ThaiSegmenter()
+    return _default
+
+
+def tokenize(text: str) -> List[str]:
+    return get_segmenter().tokenize(text)
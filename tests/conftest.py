@@ -0,0 +1,156 @@
+"""
+Shared fixtures: a small promotions.json and a SearchEngine serving it (no
+network, background refresh or prebuilt snapshot), and a local stub of the
+upstream promotions API for the fetcher and sync.
+"""
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.search import engine as search_engine_module
+
+
+def _promotion(promo_id, title, description='', days_left=30, **extra):
+    now = datetime.now()
+    end = now + timedelta(days=days_left)
+    return {
+        'id': promo_id,
+        'title': title,
+        'link': f'https://vrcomseven.com/promotions/{promo_id}',
+        'description': description,
+        'content': description,
+        'duration': '',
+        'start_date': f'{now - timedelta(days=1):%Y-%m-%d %H:%M:%S}',
+        'end_date': f'{end:%Y-%m-%d %H:%M:%S}',
+        'category': extra.get('category'),
+        'promotion_type': extra.get('promotion_type', ''),
+        'attachments': extra.get('attachments', []),
+        'keywords': extra.get('keywords', []),
+    }
+
+
+@pytest.fixture
+def promotions():
+    """Newest first, like a synced promotions.json."""
+    return [
+        _promotion(1, 'iPhone 17 Pro ผ่อน 0% 10 เดือน', 'ผ่อนชำระผ่านบัตรเครดิตกสิกร', promotion_type='โปรธนาคาร/Code ผ่อน'),
+        _promotion(2, 'แจ้งปรับราคา iPad Air', 'รายละเอียดตามไฟล์แนบ', promotion_type='ปรับราคาสินค้า'),
+        _promotion(3, 'Samsung Galaxy Trade In', 'ลดสูงสุด 5000 บาท กับบัตร KTC', promotion_type='Trade In'),
+        _promotion(4, 'Incentive Apple ประจำเดือน', 'Incentive สำหรับพนักงานขาย', promotion_type='Incentive'),
+        _promotion(5, 'ไอโฟน ราคาพิเศษ บัตรเครดิต SCB', 'เฉพาะบัตร SCB เท่านั้น', promotion_type='โปรธนาคาร/Code ผ่อน'),
+        _promotion(6, 'Gaming Mouse ลดราคา', 'เมาส์เกมมิ่ง', category='Gaming Gear'),
+    ]
+
+
+@pytest.fixture
+def data_file(tmp_path, promotions):
+    path = tmp_path / 'promotions.json'
+    path.write_text(json.dumps(promotions, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def engine(monkeypatch, data_file):
+    monkeypatch.setattr(search_engine_module, 'DATA_FILE', data_file)
+    monkeypatch.setattr(search_engine_module, 'SNAPSHOT_FILE', None)
+    return search_engine_module.SearchEngine(refresh_interval=0)
+
+
+class StubPromotionsAPI:
+    """
+    In-process stand-in for GET /v1/promotions: `records` served newest first
+    in pages of ?perpage, with ETag validators. failures maps a page number to
+    the statuses answered (in order) before the page succeeds; requests with a
+    token other than `token` get a 401.
+    """
+
+    def __init__(self, records, delay=0.0):
+        self.records = records
+        self.delay = delay
+        self.failures = {}
+        self.token = 'token'
+        self.requests = []
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1/promotions'
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, body, headers = stub.respond(self)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def respond(self, request):
+        params = parse_qs(urlparse(request.path).query)
+        page, perpage = int(params['page'][0]), int(params['perpage'][0])
+        token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        with self._lock:
+            self.requests.append((page, token))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            pending = self.failures.get(page) or []
+            failure = pending.pop(0) if pending else None
+        try:
+            time.sleep(self.delay)
+            if token != self.token:
+                return 401, b'{"message": "Unauthenticated."}', {}
+            if failure:
+                return failure, b'busy', {}
+            last_page = max(1, -(-len(self.records) // perpage))
+            body = json.dumps({
+                'data': self.records[(page - 1) * perpage:page * perpage],
+                'meta': {'last_page': last_page, 'total': len(self.records)},
+            }).encode()
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            if request.headers.get('If-None-Match') == etag:
+                return 304, b'', {'ETag': etag}
+            return 200, body, {'Content-Type': 'application/json', 'ETag': etag}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def pages(self):
+        return sorted(page for page, _ in self.requests)
+
+
+def api_record(i, updated_at='2026-02-01 00:00:00', **extra):
+    """A raw record in the upstream /v1/promotions shape."""
+    return {'id': i, 'title': f'iPhone promo {i}', 'description': 'รายละเอียดตามไฟล์แนบ',
+            'display_to': '2099-01-01 00:00:00', 'updated_at': updated_at, **extra}
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    """Running StubPromotionsAPI (250 records) that the fetcher points at, with no backoff."""
+    from src.utils import fetcher
+
+    stub = StubPromotionsAPI([api_record(i, f'2026-02-01 00:{59 - i // 60:02d}:{59 - i % 60:02d}')
+                              for i in range(250)])
+    thread = threading.Thread(target=stub.server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    monkeypatch.setattr(fetcher, 'PROMOTIONS_URL', stub.url)
+    monkeypatch.setattr(fetcher, 'BACKOFF_BASE', 0)
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
@@ -0,0 +1,87 @@
+import asyncio
+import base64
+import json
+import os
+import stat
+import threading
+import time
+
+from src.utils.auth import REFRESH_MARGIN, TokenManager
+
+
+class Login:
+    """request_login stand-in that counts calls; each login hands out a new token."""
+
+    def __init__(self, delay=0.0, **data):
+        self.delay = delay
+        self.data = data
+        self.calls = 0
+
+    def __call__(self, device_uuid):
+        time.sleep(self.delay)
+        self.calls += 1
+        return {'access_token': f'token-{self.calls}', **self.data}
+
+
+def jwt(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': exp}).encode()).decode().rstrip('=')
+    return f'header.{payload}.signature'
+
+
+def test_concurrent_threads_share_one_login():
+    login = Login(delay=0.05)
+    manager = TokenManager(login, device_uuid='test')
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tokens == ['token-1'] * 8
+    assert login.calls == manager.logins == 1
+
+
+def test_concurrent_tasks_share_one_login():
+    login = Login(delay=0.05)
+    manager = TokenManager(login, device_uuid='test')
+
+    async def main():
+        return await asyncio.gather(*(manager.get_token_async() for _ in range(8)))
+
+    assert asyncio.run(main()) == ['token-1'] * 8
+    assert login.calls == 1
+
+
+def test_rejected_token_logs_in_again():
+    login = Login()
+    manager = TokenManager(login, device_uuid='test')
+    assert manager.get_token() == 'token-1'
+    manager.invalidate('token-1')
+    assert manager.get_token() == 'token-2'
+    # A late 401 for the old token does not throw away the new one
+    manager.invalidate('token-1')
+    assert manager.get_token() == 'token-2' and login.calls == 2
+
+
+def test_expiry_comes_from_the_jwt_or_expires_in():
+    exp = time.time() + 600
+    manager = TokenManager(lambda device: {'access_token': jwt(exp), 'expires_in': 10}, device_uuid='test')
+    manager.get_token()
+    assert manager.expires_at == exp
+
+    login = Login(expires_in=REFRESH_MARGIN + 1)
+    manager = TokenManager(login, device_uuid='test')
+    manager.get_token()
+    manager.expires_at -= 2
+    assert manager.get_token() == 'token-2'
+
+
+def test_cache_file_is_private_and_reused(tmp_path):
+    path = str(tmp_path / 'token.json')
+    login = Login()
+    assert TokenManager(login, cache_file=path).get_token() == 'token-1'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    restarted = TokenManager(login, cache_file=path)
+    assert restarted.get_token() == 'token-1' and login.calls == 1
+    assert restarted.device_uuid == json.loads(open(path).read())['device_uuid']
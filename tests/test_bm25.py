@@ -0,0 +1,22 @@
+from src.search.engine import build_snapshot
+
+
+def term_frequencies(snapshot, *variants):
+    rows, _ = snapshot.scorer._term_frequencies(set(variants))
+    records = snapshot.index.records
+    return {records[doc].id: row for doc, row in rows.items()}
+
+
+def test_whole_word_tf_comes_from_token_postings(promotions):
+    promotions[3]['description'] = promotions[3]['content'] = 'Apple Care: apple applecare'
+    promotions[5]['description'] = promotions[5]['content'] = 'applecare only'
+    tf = term_frequencies(build_snapshot(promotions), 'apple')
+    # title, promotion_type, keywords, description, content (same string as description)
+    assert tf == {4: [1.0, 0.0, 0.0, 2.0, 2.0]}
+
+
+def test_partial_title_words_and_phrases_use_the_text(promotions):
+    promotions[0]['title'] = 'iPhone 17 Pro iPhone17'
+    snapshot = build_snapshot(promotions)
+    assert term_frequencies(snapshot, 'iphone')[1][0] == 1.7
+    assert term_frequencies(snapshot, 'iphone 17')[1][0] == 1.0
@@ -0,0 +1,128 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.bot import main, pages
+from src.bot.line_client import REPLY_PATH, AsyncLineClient
+from src.bot.sessions import MemorySessionStore
+from src.search.engine import NORMALIZED_STOP_WORDS, SearchEngine, active_records
+from src.search.snapshot import SearchSnapshot
+from src.utils import startup
+
+SECRET = 'channel-secret'
+TOKEN = 'channel-token'
+
+
+@pytest.fixture
+def line_stub():
+    """Local stand-in for the LINE Messaging API; records every request."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            received.append((self.path, self.headers['Authorization'], json.loads(body)))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}', received
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(monkeypatch, engine, line_stub):
+    from linebot import WebhookParser
+
+    monkeypatch.setattr(main, 'search_engine', engine)
+    monkeypatch.setattr(main, 'parser', startup.Lazy('webhook_parser', lambda: WebhookParser(SECRET)))
+    monkeypatch.setattr(main, 'line_client', startup.Lazy(
+        'line_client', lambda: AsyncLineClient(TOKEN, base_url=line_stub[0])))
+    monkeypatch.setattr(main, 'user_sessions', MemorySessionStore())
+    with TestClient(main.app) as client:
+        yield client
+
+
+def webhook(*events):
+    body = json.dumps({'destination': 'bot', 'events': list(events)})
+    signature = base64.b64encode(hmac.new(SECRET.encode(), body.encode(), hashlib.sha256).digest()).decode()
+    return body, signature
+
+
+def text_event(text, user='user-1', reply_token='reply-1', message_type='text'):
+    return {
+        'type': 'message', 'mode': 'active', 'timestamp': 0, 'webhookEventId': reply_token,
+        'deliveryContext': {'isRedelivery': False}, 'replyToken': reply_token,
+        'source': {'type': 'user', 'userId': user},
+        'message': {'type': message_type, 'id': reply_token, 'quoteToken': 'q', 'text': text},
+    }
+
+
+def test_signed_webhook_gets_a_reply(client, line_stub):
+    body, signature = webhook(text_event('iphone'), text_event('help', 'user-2', 'reply-2'))
+    response = client.post('/callback', content=body, headers={'X-Line-Signature': signature})
+    assert response.status_code == 200
+
+    received = {payload['replyToken']: (path, auth, payload) for path, auth, payload in line_stub[1]}
+    assert set(received) == {'reply-1', 'reply-2'}
+    path, auth, payload = received['reply-1']
+    assert path == REPLY_PATH
+    assert auth == f'Bearer {TOKEN}'
+    message = payload['messages'][0]
+    assert message['type'] == 'flex'
+    assert message['altText'].startswith('พบ 2 รายการ')
+    assert received['reply-2'][2]['messages'][0]['type'] == 'text'
+
+
+def test_invalid_signature_is_rejected(client, line_stub):
+    body, _ = webhook(text_event('iphone'))
+    response = client.post('/callback', content=body, headers={'X-Line-Signature': 'bad'})
+    assert response.status_code == 400
+    assert line_stub[1] == []
+
+
+def test_non_text_messages_are_ignored(client, line_stub):
+    event = text_event('', message_type='sticker')
+    event['message'].update({'packageId': '1', 'stickerId': '1', 'stickerResourceType': 'STATIC'})
+    body, signature = webhook(event)
+    assert client.post('/callback', content=body, headers={'X-Line-Signature': signature}).status_code == 200
+    assert line_stub[1] == []
+
+
+def test_pages_are_keyed_on_the_version_they_were_read_from(monkeypatch, client, engine, promotions):
+    old_version = engine.data_version
+    assert 'iPhone 17 Pro' in client.get('/view/1').text
+
+    promotions[0]['title'] = 'iPhone 17 Pro Max'
+    engine._publish(SearchSnapshot.build(active_records(promotions), old_version + 1, NORMALIZED_STOP_WORDS))
+    # A reader that looked at data_version just before the swap would cache the new record under the old key
+    monkeypatch.setattr(SearchEngine, 'data_version', property(lambda self: old_version))
+
+    assert 'iPhone 17 Pro Max' in client.get('/view/1').text
+    assert (1, old_version + 1) in pages.page_cache
+    records, version = engine.get_by_ids([1, 99, 3])
+    assert [r.id for r in records] == [1, 3] and version == old_version + 1
+    assert client.get('/view/99').status_code == 404
+
+
+def test_clients_of_closed_loops_are_dropped(line_stub):
+    line_client = AsyncLineClient(TOKEN, base_url=line_stub[0])
+    for n in range(3):
+        asyncio.run(line_client.reply_message(f'reply-{n}', {'type': 'text', 'text': 'hi'}))
+    assert len(line_client._clients) == 1
+    assert [payload['replyToken'] for _, _, payload in line_stub[1]] == ['reply-0', 'reply-1', 'reply-2']
@@ -0,0 +1,40 @@
+from src.search.cache import LRUCache
+from src.search.engine import NORMALIZED_STOP_WORDS, active_records
+from src.search.snapshot import SearchSnapshot
+
+
+def test_lru_counts_hits_and_evicts_oldest():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert 'a' in cache and 'c' in cache
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 1, 'misses': 1}
+
+
+def count_scoring(monkeypatch, engine):
+    calls = []
+    score = engine._score
+    monkeypatch.setattr(engine, '_score', lambda query, *args: calls.append(query) or score(query, *args))
+    return calls
+
+
+def test_repeated_and_zero_result_queries_are_scored_once(monkeypatch, engine):
+    calls = count_scoring(monkeypatch, engine)
+    for query in ('iphone', ' IPHONE ', 'zzzz', 'zzzz'):
+        engine.search_page(query, 0, 10)
+    assert calls == ['iphone', 'zzzz']
+    assert engine.search_page('zzzz', 0, 10) == ([], 0)
+    assert engine.result_cache.hits == 3
+
+
+def test_new_snapshot_invalidates_cached_results(monkeypatch, engine, promotions):
+    calls = count_scoring(monkeypatch, engine)
+    assert engine.search_page('s26', 0, 10)[1] == 0
+    promotions[2]['title'] = 'Samsung Galaxy S26 Trade In'
+    engine._publish(SearchSnapshot.build(active_records(promotions), engine.data_version + 1, NORMALIZED_STOP_WORDS))
+    assert len(engine.result_cache) == 0
+    assert [h.id for h in engine.search_page('s26', 0, 10)[0]] == [3]
+    assert calls == ['s26', 's26']
@@ -0,0 +1,52 @@
+import time
+from datetime import datetime
+
+from src.search.engine import NORMALIZED_STOP_WORDS, SearchEngine, active_records
+from src.search.records import PromoRecord
+from src.search.snapshot import SearchSnapshot
+from src.utils.dates import duration_text
+
+
+def test_expired_promotions_are_hidden_without_copying(monkeypatch, promotions, engine):
+    promotions[0]['end_date'] = promotions[1]['end_date'] = '2000-01-01 00:00:00'
+    snapshot = SearchSnapshot.build(active_records(promotions, now=946000000), 2, NORMALIZED_STOP_WORDS)
+    engine._publish(snapshot)
+
+    expired, bits = snapshot.expired(time.time())
+    assert {snapshot.index.records[doc].id for doc in expired} == {1, 2}
+    assert bits.bit_count() == 2
+    assert snapshot.expired(946000000) == (frozenset(), 0)
+
+    assert [h.id for h in engine.search('iphone')] == [5]
+    assert engine.search_page('iphone', 0, 10)[1] == 1
+    assert engine.search_ids('iphone')[0] == [5]
+    assert engine.search_filtered('', {})[1] == 4
+    assert [r.id for r in engine.get_latest(2)] == [3, 4]
+    assert engine.get_by_id(1) is None and engine.get_by_id(3).id == 3
+    # Reads never publish a new snapshot; the refresh thread compacts
+    assert engine.snapshot is snapshot
+
+    monkeypatch.setattr(engine, 'check_and_update_data', lambda: None)
+    engine.refresh()
+    assert engine.snapshot is not snapshot
+    assert sorted(r.id for r in engine.promotions) == [3, 4, 5, 6]
+    assert [h.id for h in engine.search('iphone')] == [5]
+
+
+def test_duration_text_counts_calendar_days():
+    end = datetime(2026, 10, 18, 23, 59, 59)
+    assert duration_text(end, datetime(2026, 10, 18, 9, 0)) == 'วันนี้วันสุดท้าย'
+    assert duration_text(end, datetime(2026, 10, 17, 9, 0)) == 'เหลือเวลาอีก 1 วัน'
+    assert duration_text(end, datetime(2026, 10, 1, 0, 0)) == 'เหลือเวลาอีก 17 วัน'
+    assert duration_text(end, datetime(2026, 10, 19, 0, 0)) == 'หมดอายุแล้ว'
+    assert duration_text(None) == ''
+
+
+def test_end_date_wins_over_stale_duration_text(promotions):
+    promo = dict(promotions[0], duration='หมดอายุแล้ว', end_date='2026-10-18 23:59:59')
+    record = PromoRecord.from_dict(promo)
+    assert not SearchEngine.is_expired(record, now=datetime(2026, 10, 18, 9, 0).timestamp())
+    assert SearchEngine.is_expired(record, now=datetime(2026, 10, 19, 0, 0).timestamp())
+
+    # Without an end date the sync-time text is all there is
+    assert SearchEngine.is_expired(PromoRecord.from_dict(dict(promo, end_date='')))
@@ -0,0 +1,73 @@
+import random
+
+from src.search.facets import FacetIndex, facet_values, from_bits, to_bits
+from src.search.records import PromoRecord
+
+
+def test_bits_round_trip():
+    assert to_bits([]) == 0 and from_bits(0) == []
+    assert to_bits([0, 3]) == 0b1001
+    assert to_bits({3: 1.0, 0: 2.0}) == 0b1001
+    docs = sorted(random.Random(0).sample(range(200_000), 5_000))
+    bits = to_bits(docs)
+    assert bits.bit_count() == len(docs)
+    assert from_bits(bits) == docs
+
+
+def test_facet_values_detect_banks_and_brands():
+    record = PromoRecord.from_dict({
+        'id': 1, 'title': 'ไอโฟน ผ่อน 0% กับ KBank', 'description': 'บัตรเครดิตกสิกร', 'category': 'Phone',
+        'promotion_type': 'โปรธนาคาร/Code ผ่อน',
+    })
+    values = set(facet_values(record))
+    assert ('bank', 'KBank') in values
+    assert ('brand', 'Apple') in values
+    assert ('category', 'Phone') in values
+    assert ('promotion_type', 'โปรธนาคาร/Code ผ่อน') in values
+    # English spellings match whole words only
+    assert ('brand', 'HP') not in set(facet_values(PromoRecord.from_dict({'id': 2, 'title': 'iphone shop'})))
+
+
+def test_facet_index_match_counts_and_remove():
+    records = [PromoRecord.from_dict(p) for p in (
+        {'id': 1, 'title': 'iphone kbank', 'promotion_type': 'Bank'},
+        {'id': 2, 'title': 'samsung kbank', 'promotion_type': 'Bank'},
+        {'id': 3, 'title': 'iphone trade in', 'promotion_type': 'Trade In'},
+    )]
+    facets = FacetIndex()
+    for doc, record in enumerate(records):
+        facets.add(doc, record)
+
+    assert from_bits(facets.match(facets.live, {'brand': 'Apple'})) == [0, 2]
+    assert from_bits(facets.match(facets.live, {'brand': 'Apple', 'bank': 'KBank'})) == [0]
+    counts = facets.counts(facets.live, {'brand': 'Apple'})
+    # A facet is counted without its own filter
+    assert counts['brand'] == {'Apple': 2, 'Samsung': 1}
+    assert counts['bank'] == {'KBank': 1}
+
+    clone = facets.copy()
+    clone.remove(0)
+    assert from_bits(clone.match(clone.live, {'brand': 'Apple'})) == [2]
+    assert from_bits(facets.match(facets.live, {'brand': 'Apple'})) == [0, 2]
+    clone.remove(2)
+    assert 'Apple' not in clone.bits['brand']
+
+
+def test_search_filtered(engine):
+    hits, total, counts, version = engine.search_filtered('', {'bank': 'SCB'})
+    assert [h.id for h in hits] == [5] and total == 1
+    assert version == engine.data_version
+
+    assert engine.search_filtered('ผ่อน', {})[1] == 2
+    hits, total, counts, _ = engine.search_filtered('ผ่อน', {'bank': 'KBank'})
+    assert total == 1 and hits[0].id == 1
+    assert counts['bank'] == {'KBank': 1, 'SCB': 1}
+
+    # Counts cover every candidate, not just the page
+    hits, total, counts, _ = engine.search_filtered('', {}, 0, 2)
+    assert len(hits) == 2 and total == 6
+    assert counts['category'] == {'Gaming Gear': 1}
+    assert sum(counts['promotion_type'].values()) == 5
+
+    assert engine.search_filtered('', {'brand': 'Sony'})[:2] == ([], 0)
+    assert engine.search_filtered('iphone', {}, 0, 0)[:2] == ([], 2)
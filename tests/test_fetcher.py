@@ -0,0 +1,96 @@
+import pytest
+
+from src.utils import fetcher
+from src.utils.auth import TokenManager
+
+
+def fetch_all(token='token', **kwargs):
+    return fetcher.run_async(fetcher.fetch_all_promotions(token, **kwargs))
+
+
+def test_fetches_every_page_in_feed_order(stub_api):
+    stub_api.delay = 0.02
+    records = fetch_all(perpage=20, concurrency=3)
+    assert [r['id'] for r in records] == list(range(250))
+    assert stub_api.pages() == list(range(1, 14))
+    assert 1 < stub_api.max_in_flight <= 3
+
+
+def test_single_page_feed(stub_api):
+    stub_api.records = stub_api.records[:5]
+    assert [r['id'] for r in fetch_all()] == [0, 1, 2, 3, 4]
+    assert stub_api.pages() == [1]
+
+
+def test_retries_server_errors_and_rate_limits(stub_api):
+    stub_api.failures = {1: [502], 3: [503, 503], 5: [429]}
+    records = fetch_all(perpage=50)
+    assert len(records) == 250
+    assert stub_api.pages() == [1, 1, 2, 3, 3, 3, 4, 5, 5]
+
+
+def test_gives_up_after_max_retries(stub_api):
+    stub_api.failures = {2: [503] * (fetcher.MAX_RETRIES + 5)}
+    with pytest.raises(RuntimeError, match='page 2: 503'):
+        fetch_all(perpage=100)
+    assert stub_api.pages().count(2) == fetcher.MAX_RETRIES + 1
+
+
+def test_client_errors_are_not_retried(stub_api):
+    stub_api.failures = {2: [404]}
+    with pytest.raises(RuntimeError, match='page 2: 404'):
+        fetch_all(perpage=100)
+    assert stub_api.pages().count(2) == 1
+    # The synchronous wrapper logs and returns nothing
+    stub_api.failures = {1: [400]}
+    assert fetcher.fetch_promotions_data('token') == []
+
+
+def test_connection_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(fetcher, 'BACKOFF_BASE', 0)
+    monkeypatch.setattr(fetcher, 'PROMOTIONS_URL', 'http://127.0.0.1:9/v1/promotions')
+    with pytest.raises(RuntimeError, match='page 1'):
+        fetch_all()
+
+
+def test_expired_token_logs_in_once(stub_api, monkeypatch):
+    logins = []
+    manager = TokenManager(lambda device: logins.append(device) or {'access_token': 'token'}, device_uuid='test')
+    manager.token, manager.expires_at = 'stale', 1e12
+    monkeypatch.setattr(fetcher, 'token_manager', manager)
+
+    records = fetch_all(manager.get_token(), perpage=50, concurrency=4)
+    assert len(records) == 250
+    assert len(logins) == 1
+    assert stub_api.requests[0][1] == 'stale'
+    assert stub_api.requests[-1][1] == 'token'
+
+
+def test_stopping_early_cancels_remaining_pages(stub_api):
+    stub_api.delay = 0.01
+
+    async def first(n):
+        stream = fetcher.stream_promotions('token', perpage=10, concurrency=1)
+        records = []
+        try:
+            async for record in stream:
+                records.append(record)
+                if len(records) == n:
+                    break
+        finally:
+            await stream.aclose()
+        return records
+
+    assert len(fetcher.run_async(first(15))) == 15
+    assert len(stub_api.requests) < 25
+
+
+def test_conditional_first_page(stub_api):
+    validators = {}
+    assert len(fetch_all(validators=validators)) == 250
+    assert validators['etag']
+
+    again = dict(validators)
+    assert fetch_all(validators=again) == []
+    assert again['not_modified']
+    assert stub_api.requests[-1][0] == 1
@@ -0,0 +1,32 @@
+import pytest
+
+from src.bot import flex
+from src.search.cache import LRUCache
+from src.search.engine import active_records
+
+
+@pytest.fixture
+def bubble_cache(monkeypatch):
+    cache = LRUCache(maxsize=flex.BUBBLE_CACHE_SIZE)
+    monkeypatch.setattr(flex, 'bubble_cache', cache)
+    return cache
+
+
+def test_bubbles_are_built_once_per_id_and_version(monkeypatch, bubble_cache, promotions):
+    built = []
+    build_bubble = flex.build_bubble
+    monkeypatch.setattr(flex, 'build_bubble', lambda promo: built.append(promo.id) or build_bubble(promo))
+    records = active_records(promotions)
+
+    first = flex.carousel(records[:3], 1)
+    second = flex.carousel(records[1:4], 1)
+    assert built == [1, 2, 3, 4]
+    assert second.contents[0] is first.contents[1]
+    assert bubble_cache.stats()['hits'] == 2
+
+    # Same promotion at a new data version gets a new bubble
+    updated = active_records([dict(promotions[0], title='iPhone 17 Pro Max')])
+    bubble = flex.carousel(updated, 2).contents[0]
+    assert built == [1, 2, 3, 4, 1]
+    assert bubble.header.contents[0].text == 'iPhone 17 Pro Max'
+    assert flex.carousel(records[:1], 1).contents[0].header.contents[0].text == 'iPhone 17 Pro ผ่อน 0% 10 เดือน'
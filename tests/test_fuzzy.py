@@ -0,0 +1,48 @@
+import difflib
+
+from src.search.fuzzy import SIMILARITY, FuzzyIndex
+
+
+def index(*titles):
+    fuzzy = FuzzyIndex()
+    for doc, title in enumerate(titles):
+        fuzzy.add(doc, title)
+    return fuzzy
+
+
+def test_transposed_letters_still_match():
+    fuzzy = index('iphone 17 pro', 'ipad air', 'samsung galaxy')
+    assert fuzzy.match('ipohne') == {0: 'iphone'}
+    assert fuzzy.match('samsnug') == {2: 'samsung'}
+
+
+def test_ratio_must_be_above_the_threshold():
+    fuzzy = index('incentive')
+    for query in ('incentiv', 'inccentive', 'intencive', 'insentive', 'incen'):
+        ratio = difflib.SequenceMatcher(None, query, 'incentive').ratio()
+        assert bool(fuzzy.similar_words(query)) == (ratio > SIMILARITY), query
+    assert fuzzy.similar_words('incentiv') and not fuzzy.similar_words('incen')
+
+
+def test_length_bound_skips_words_that_can_not_be_similar():
+    fuzzy = index('promotion promotions')
+    # 'promo' vs 'promotions': 2*5 / 15 = 0.67, rejected without running SequenceMatcher
+    assert fuzzy.similar_words('promo') == {}
+    assert set(fuzzy.similar_words('promotio')) == {'promotion', 'promotions'}
+
+
+def test_only_words_longer_than_four_characters_are_indexed():
+    fuzzy = index('ipad mini promo deals')
+    assert set(fuzzy.words) == {'promo', 'deals'}
+    # Even an exact 4-character word has nothing to match
+    assert fuzzy.match('ipad') == {}
+    assert fuzzy.match('promo') == {0: 'promo'}
+
+
+def test_remove_and_first_word_wins():
+    fuzzy = index('iphone iphones', 'iphone')
+    assert fuzzy.match('iphome') == {0: 'iphone', 1: 'iphone'}
+    fuzzy.remove(1, 'iphone')
+    assert fuzzy.match('iphome') == {0: 'iphone'}
+    fuzzy.remove(0, 'iphone iphones')
+    assert not fuzzy.words and not fuzzy.grams
@@ -0,0 +1,24 @@
+from src.search.highlight import Highlighter
+from src.utils.thai_text import normalize
+
+
+def test_overlapping_terms_are_merged():
+    assert Highlighter({'he', 'she', 'hers'}).spans('ushers') == [(1, 6)]
+    highlighter = Highlighter({'iphone', 'phone 16'})
+    assert highlighter.mark('iPhone 16 Pro') == '<em>iPhone 16</em> Pro'
+
+
+def test_marks_every_occurrence():
+    assert Highlighter({'ผอน'}).mark('ผ่อน 0% ผ่อนนาน') == '<em>ผ่อน</em> 0% <em>ผ่อน</em>นาน'
+
+
+def test_positions_map_back_through_normalization():
+    # Tone marks are dropped for matching but kept in the output
+    assert Highlighter({normalize('ซัมซุง')}).mark('โปร ซัมซุ่ง Galaxy') == 'โปร <em>ซัมซุ่ง</em> Galaxy'
+    assert Highlighter({'แมค'}).mark('เเมค') == '<em>เเมค</em>'
+
+
+def test_no_terms_or_no_match_returns_text():
+    assert Highlighter([]).mark('abc') == 'abc'
+    assert Highlighter(['zz']).mark('abc') == 'abc'
+    assert Highlighter(['a']).mark('') == ''
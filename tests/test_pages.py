@@ -0,0 +1,14 @@
+from src.bot.pages import render_page, write_static_pages
+from src.search.engine import active_records
+
+
+def test_static_pages_follow_the_active_promotions(tmp_path, promotions):
+    records = active_records(promotions)
+    assert write_static_pages(records, tmp_path) == 6
+    view = tmp_path / 'view'
+    assert sorted(p.name for p in view.iterdir()) == [f'{i}.html' for i in range(1, 7)]
+    assert (view / '1.html').read_text(encoding='utf-8') == render_page(records[0])
+
+    promotions[0]['end_date'] = '2000-01-01 00:00:00'
+    assert write_static_pages(active_records(promotions[:4]), tmp_path) == 3
+    assert sorted(p.name for p in view.iterdir()) == ['2.html', '3.html', '4.html']
@@ -0,0 +1,29 @@
+import threading
+
+
+def test_searches_never_see_a_half_built_index(engine, promotions):
+    new = dict(promotions[0], id=7, title='iPhone 17e ผ่อน 0%')
+    answers = {(1, 5), (1, 5, 7)}
+    errors = []
+    stop = threading.Event()
+
+    def search():
+        while not stop.is_set():
+            hits, total = engine.search_page('iphone', 0, 10)
+            ids = tuple(sorted(h.id for h in hits))
+            if ids not in answers or total != len(ids):
+                errors.append((ids, total))
+
+    searchers = [threading.Thread(target=search) for _ in range(4)]
+    for thread in searchers:
+        thread.start()
+    try:
+        for _ in range(50):
+            engine.apply_delta([new], removed_ids=[])
+            engine.apply_delta([], removed_ids=[7])
+    finally:
+        stop.set()
+        for thread in searchers:
+            thread.join()
+    assert errors == []
+    assert engine.data_version == 101
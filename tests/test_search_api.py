@@ -0,0 +1,127 @@
+import io
+import json
+from urllib.parse import urlencode
+
+import pytest
+
+import api.search as search_api
+from src.search.serialize import HIT_FIELDS, parse_fields
+
+
+class Request(search_api.handler):
+    """The Vercel handler without a socket: the response is collected in memory."""
+
+    def __init__(self, path, body=b''):
+        self.path = path
+        self.headers = {'Content-Length': str(len(body))}
+        self.rfile = io.BytesIO(body)
+        self.wfile = io.BytesIO()
+        self.status = None
+
+    def send_response(self, code, message=None):
+        self.status = code
+
+    def send_header(self, name, value):
+        pass
+
+    def end_headers(self):
+        pass
+
+    def json(self):
+        return json.loads(self.wfile.getvalue())
+
+
+@pytest.fixture(autouse=True)
+def use_engine(monkeypatch, engine):
+    monkeypatch.setattr(search_api, 'search_engine', engine)
+
+
+def get(params):
+    request = Request('/api/search?' + urlencode(params))
+    request.do_GET()
+    return request.status, request.json()
+
+
+def post(body):
+    request = Request('/api/search', body if isinstance(body, bytes) else json.dumps(body).encode())
+    request.do_POST()
+    return request.status, request.json()
+
+
+def test_get_search_with_fields_and_facets():
+    status, response = get({'q': 'iphone', 'fields': 'id,title'})
+    assert status == 200
+    assert response['meta'] == {'total': 2, 'page': 1, 'limit': 20, 'total_pages': 1}
+    assert [set(item) for item in response['data']] == [{'id', 'title'}] * 2
+    assert response['facets']['brand'] == {'Apple': 2}
+
+
+def test_get_without_query_lists_latest():
+    status, response = get({'limit': 4, 'page': 2})
+    assert status == 200
+    assert response['meta']['total'] == 6
+    assert [item['id'] for item in response['data']] == [5, 6]
+
+
+def test_results_use_the_version_they_were_searched_at(engine, promotions):
+    assert get({'q': 'samsung', 'fields': 'title'})[1]['data'] == [{'title': 'Samsung Galaxy Trade In'}]
+    engine.apply_delta([dict(promotions[2], title='Samsung Galaxy S26 Trade In')], removed_ids=[])
+    assert get({'q': 'samsung', 'fields': 'title'})[1]['data'] == [{'title': 'Samsung Galaxy S26 Trade In'}]
+
+
+def test_parse_fields():
+    assert parse_fields('') is None
+    assert parse_fields('title, id,unknown') == ('id', 'title')
+    assert parse_fields('unknown') is None
+    assert parse_fields('highlight,id', HIT_FIELDS) == ('id', 'highlight')
+
+
+def test_batch_matches_single_searches():
+    queries = [{'q': 'iphone'}, {'q': 'ไอโฟน', 'page': 2, 'limit': 1}, {'brand': 'Apple', 'limit': 3, 'fields': 'id'}]
+    status, response = post({'queries': queries})
+    assert status == 200 and response['success']
+    for query, result in zip(queries, response['results']):
+        single = get(query)[1]
+        single.pop('success')
+        assert result == single
+
+
+@pytest.mark.parametrize('body, error', [
+    (b'{bad json', 'Expecting'),
+    (b'\xff\xfe', 'Expecting'),
+    ({'queries': []}, 'queries must be a list'),
+    ({'queries': [{}] * (search_api.MAX_BATCH_QUERIES + 1)}, 'queries must be a list'),
+    ({'queries': ['iphone']}, 'each search must be an object'),
+    ({'queries': [{'q': 5}]}, 'q must be a string'),
+    ({'queries': [{'brand': ['Apple']}]}, 'brand must be a string'),
+    ({'queries': [{'page': 0}]}, 'page must be at least 1'),
+    ({'queries': [{'limit': 'ten'}]}, 'limit must be an integer'),
+    ({'queries': [{'limit': True}]}, 'limit must be an integer'),
+    ({'queries': [{'limit': search_api.MAX_BATCH_LIMIT + 1}]}, 'limit must be between'),
+    ({'queries': [{}], 'fields': ['id']}, 'fields must be a string'),
+])
+def test_malformed_batch_is_a_400(body, error):
+    status, response = post(body)
+    assert status == 400
+    assert response['success'] is False and error in response['error']
+
+
+def test_batch_accepts_null_and_numeric_strings():
+    status, response = post({'queries': [{'q': 'iphone', 'brand': None, 'page': '1', 'limit': '1'}]})
+    assert status == 200
+    assert response['results'][0]['meta'] == {'total': 2, 'page': 1, 'limit': 1, 'total_pages': 2}
+
+
+def test_search_batch_matches_single_searches(engine):
+    searches = [
+        {'q': 'iphone'},
+        {'q': 'ไอโฟน', 'limit': 1},
+        {'q': '', 'filters': {'brand': 'Apple'}, 'offset': 1, 'limit': 2},
+    ]
+    results, version = engine.search_batch(searches)
+    assert version == engine.data_version
+    for search, (hits, total, counts) in zip(searches, results):
+        single = engine.search_filtered(search['q'], search.get('filters', {}),
+                                        search.get('offset', 0), search.get('limit', 20))
+        assert [h.id for h in hits] == [h.id for h in single[0]]
+        assert (total, counts) == single[1:3]
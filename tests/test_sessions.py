@@ -0,0 +1,79 @@
+import pytest
+
+from src.bot import main, sessions
+from src.bot.sessions import MemorySessionStore, SQLiteSessionStore
+
+
+def test_sessions_expire_in_queue_order():
+    store = MemorySessionStore(ttl=10)
+    store.set('a', 'iphone', 1, [1, 5], now=0)
+    store.set('b', 'ipad', 1, [2], now=4)
+    assert store.get('a', now=9).ids.tolist() == [1, 5]
+    assert store.get('a', now=11) is None
+    assert store.get('b', now=11).query == 'ipad'
+    assert store.get('b', now=15) is None
+    assert store.expirations == 2 and len(store) == 0
+
+
+def test_replaced_session_outlives_its_old_queue_entry():
+    store = MemorySessionStore(ttl=10)
+    store.set('a', 'iphone', 1, [1], now=0)
+    store.set('a', 'ipad', 1, [2], now=5)
+    assert store.get('a', now=12).query == 'ipad'
+    assert store.expirations == 0
+
+    # Stale entries are compacted instead of growing with every search
+    for now in range(100):
+        store.set('a', 'iphone', 1, [1], now=now)
+    assert len(store._expiry) <= 2 * len(store) + 64
+
+
+def test_cap_evicts_least_recently_used():
+    store = MemorySessionStore(ttl=10, maxsize=2)
+    store.set('a', 'iphone', 1, [1], now=0)
+    store.set('b', 'ipad', 1, [2], now=0)
+    store.get('a', now=1)
+    store.set('c', 'mac', 1, [3], now=1)
+    assert store.get('b', now=1) is None
+    assert store.get('a', now=1) and store.get('c', now=1)
+    assert store.stats() == {'backend': 'memory', 'size': 2, 'maxsize': 2, 'evictions': 1, 'expirations': 0}
+
+
+def test_sqlite_sessions_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'sessions.sqlite3')
+    first, second = SQLiteSessionStore(path, ttl=10), SQLiteSessionStore(path, ttl=10)
+    assert not first.local
+
+    first.set('a', 'iphone', 3, [1, 5], now=100)
+    session = second.get('a', now=105)
+    assert (session.query, session.version, session.ids.tolist()) == ('iphone', 3, [1, 5])
+    second.set('a', 'ipad', 4, [2], now=106)
+    assert first.get('a', now=107).query == 'ipad'
+    assert first.get('a', now=117) is None
+
+
+def test_sqlite_cleanup_trims_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(sessions, 'CLEANUP_INTERVAL', 0)
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.sqlite3'), ttl=10, maxsize=2)
+    store.set('a', 'iphone', 1, [1], now=0)
+    store.set('b', 'ipad', 1, [2], now=1)
+    store.get('a', now=2)
+    store.set('c', 'mac', 1, [3], now=3)
+    assert store.get('b', now=3) is None
+    assert len(store) == 2 and store.evictions == 1
+    store.get('c', now=20)
+    assert len(store) == 0 and store.expirations == 2
+
+
+@pytest.mark.parametrize('backend, total', [('memory', 3), ('sqlite', 2)])
+def test_next_page_after_a_data_change(monkeypatch, tmp_path, engine, promotions, backend, total):
+    store = MemorySessionStore() if backend == 'memory' else SQLiteSessionStore(str(tmp_path / 'sessions.sqlite3'))
+    monkeypatch.setattr(main, 'search_engine', engine)
+    monkeypatch.setattr(main, 'user_sessions', store)
+    assert main.build_reply('user-1', 'iphone').alt_text.startswith('พบ 2 รายการ')
+
+    engine.apply_delta([dict(promotions[0], id=7, title='iPhone 17e')], removed_ids=[])
+    reply = main.build_reply('user-1', 'หน้า 1')
+    # A local store ranks again at the new version; a shared one serves the stored ids
+    assert reply.alt_text.startswith(f'พบ {total} รายการ')
+    assert store.get('user-1').total == total
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from src.search import engine as search_engine_module
+from src.search import snapshot as snapshot_module
+from src.search.engine import build_snapshot, index_config_digest, write_snapshot_file
+from src.search.snapshot import load_snapshot, save_snapshot, snapshot_matches, source_digest
+
+YEAR = 2026
+CONFIG = source_digest(b'config')
+
+
+def ranked_ids(engine, snapshot, query):
+    scores, _ = engine._score(query, snapshot)
+    records = snapshot.index.records
+    return [records[doc].id for doc in sorted(scores, key=lambda d: (-scores[d], d))]
+
+
+@pytest.fixture
+def snapshot(promotions):
+    return build_snapshot(promotions)
+
+
+def test_save_and_load_round_trip(tmp_path, engine, snapshot):
+    path = tmp_path / 'promotions.snapshot'
+    digest = source_digest(b'source')
+    save_snapshot(snapshot, path, digest, YEAR, CONFIG)
+
+    assert snapshot_matches(path, digest, YEAR, CONFIG)
+    loaded = load_snapshot(path, digest, YEAR, CONFIG)
+    assert [r.id for r in loaded.promotions] == [r.id for r in snapshot.promotions]
+    for query in ('iphone', 'ไอโฟน', 'ผ่อน', 'samsnug'):
+        assert ranked_ids(engine, loaded, query) == ranked_ids(engine, snapshot, query)
+
+
+def test_stale_or_damaged_snapshot_is_not_loaded(tmp_path, monkeypatch, snapshot):
+    path = tmp_path / 'promotions.snapshot'
+    digest = source_digest(b'source')
+    save_snapshot(snapshot, path, digest, YEAR, CONFIG)
+
+    assert load_snapshot(path, source_digest(b'other'), YEAR, CONFIG) is None
+    assert load_snapshot(path, digest, YEAR + 1, CONFIG) is None
+    assert load_snapshot(path, digest, YEAR, source_digest(b'other config')) is None
+    assert load_snapshot(tmp_path / 'missing', digest, YEAR, CONFIG) is None
+    with monkeypatch.context() as m:
+        m.setattr(snapshot_module, 'SNAPSHOT_FORMAT', snapshot_module.SNAPSHOT_FORMAT + 1)
+        assert not snapshot_matches(path, digest, YEAR, CONFIG)
+        assert load_snapshot(path, digest, YEAR, CONFIG) is None
+
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    assert load_snapshot(path, digest, YEAR, CONFIG) is None
+    path.write_bytes(data[:10])
+    assert load_snapshot(path, digest, YEAR, CONFIG) is None
+
+
+def test_write_snapshot_file_only_when_source_changed(tmp_path, data_file, promotions):
+    path = tmp_path / 'promotions.snapshot'
+    assert write_snapshot_file(data_file, path)
+    assert not write_snapshot_file(data_file, path)
+    assert write_snapshot_file(data_file, path, force=True)
+
+    data_file.write_text(json.dumps(promotions[:2]), encoding='utf-8')
+    assert write_snapshot_file(data_file, path)
+
+
+def test_engine_loads_matching_snapshot(monkeypatch, tmp_path, data_file, capsys):
+    path = tmp_path / 'promotions.snapshot'
+    write_snapshot_file(data_file, path)
+    monkeypatch.setattr(search_engine_module, 'DATA_FILE', data_file)
+    monkeypatch.setattr(search_engine_module, 'SNAPSHOT_FILE', path)
+    engine = search_engine_module.SearchEngine(refresh_interval=0)
+    assert 'from promotions.snapshot' in capsys.readouterr().out
+    assert [h.id for h in engine.search('iphone')] == [1, 5]
+
+
+def test_index_config_change_rebuilds_snapshot(monkeypatch, tmp_path, data_file):
+    path = tmp_path / 'promotions.snapshot'
+    config = index_config_digest()
+    assert write_snapshot_file(data_file, path)
+
+    monkeypatch.setattr(search_engine_module, 'NORMALIZED_STOP_WORDS', search_engine_module.NORMALIZED_STOP_WORDS | {'โปร'})
+    assert index_config_digest() != config
+    assert write_snapshot_file(data_file, path)
+    monkeypatch.undo()
+    assert index_config_digest() == config
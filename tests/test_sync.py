@@ -0,0 +1,146 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from api.promotions import process_promotions
+from src.search import engine as search_engine_module
+from src.search.engine import NORMALIZED_STOP_WORDS, SearchEngine, active_records, build_snapshot, index_config_digest
+from src.search.snapshot import SearchSnapshot, load_snapshot, source_digest
+from src.utils import fetcher, sync
+from src.utils.sync import last_synced, load_state, state_path, sync_promotions
+
+
+@pytest.fixture
+def sync_file(tmp_path):
+    return tmp_path / 'synced' / 'promotions.json'
+
+
+def stored_ids(sync_file):
+    return [p['id'] for p in json.loads(sync_file.read_text(encoding='utf-8'))]
+
+
+def result_ids(engine, snapshot, query):
+    scores, _ = engine._score(query, snapshot)
+    return sorted(snapshot.index.records[doc].id for doc in scores)
+
+
+def test_first_sync_is_full(stub_api, sync_file):
+    delta = sync_promotions('token', sync_file, process_promotions)
+    assert delta['full'] and not delta['not_modified']
+    assert delta['fetched'] == 250 and len(delta['added']) == 250
+    assert stored_ids(sync_file) == list(range(250))
+
+    state = load_state(sync_file)
+    assert state['high_water'] == '2026-02-01 00:59:59'
+    assert state['processing_version'] == sync.PROCESSING_VERSION
+    assert len(state['hashes']) == 250 and state['etag']
+    assert last_synced(sync_file) == pytest.approx(time.time(), abs=60)
+
+def test_delta_sync_reads_only_new_records(stub_api, sync_file):
+    sync_promotions('token', sync_file, process_promotions)
+    stub_api.records[0] = dict(stub_api.records[0], title='iPhone promo 0 updated', updated_at='2026-03-01 00:00:00')
+    stub_api.requests.clear()
+
+    delta = sync_promotions('token', sync_file, process_promotions)
+    assert not delta['full']
+    assert delta['changed'] == [0] and delta['added'] == [] and delta['removed'] == []
+    assert [p['title'] for p in delta['upserts']] == ['iPhone promo 0 updated']
+    # Stops at the first record older than the last sync
+    assert stub_api.pages() == [1]
+    assert json.loads(sync_file.read_text(encoding='utf-8'))[0]['title'] == 'iPhone promo 0 updated'
+    assert load_state(sync_file)['high_water'] == '2026-03-01 00:00:00'
+
+def test_full_sync_removes_deleted_records(stub_api, sync_file):
+    sync_promotions('token', sync_file, process_promotions)
+    del stub_api.records[10]
+
+    delta = sync_promotions('token', sync_file, process_promotions, full=True)
+    assert delta['removed'] == [10]
+    assert 10 not in stored_ids(sync_file) and len(stored_ids(sync_file)) == 249
+
+def test_apply_matches_rebuild(engine, promotions):
+    snapshot = build_snapshot(promotions)
+    updated = dict(promotions[1], title='แจ้งปรับราคา iPhone 17')
+    new = active_records([updated, {**promotions[0], 'id': 7}])
+    applied = snapshot.apply(new, removed_ids={3}, version=2)
+
+    expected_promos = [updated, {**promotions[0], 'id': 7}] + [p for p in promotions if p['id'] not in (2, 3)]
+    rebuilt = SearchSnapshot.build(active_records(expected_promos), 2, NORMALIZED_STOP_WORDS)
+    assert [r.id for r in applied.promotions] == [r.id for r in rebuilt.promotions]
+    for query in ('iphone', 'ปรับราคา', 'samsung', 'ผ่อน'):
+        assert result_ids(engine, applied, query) == result_ids(engine, rebuilt, query)
+    # The published snapshot is untouched
+    assert result_ids(engine, snapshot, 'samsung') == [3]
+
+
+def test_engine_applies_delta_in_place(engine, promotions):
+    version = engine.data_version
+    engine.apply_delta([dict(promotions[2], title='Samsung Galaxy S26 Trade In')], removed_ids=[6])
+    assert engine.data_version == version + 1
+    assert [r.id for r in engine.promotions] == [3, 1, 2, 4, 5]
+    assert engine.get_by_id(3).title == 'Samsung Galaxy S26 Trade In'
+    assert [h.id for h in engine.search('s26')] == [3]
+    assert engine.search('gaming') == []
+
+
+def test_unchanged_feed_costs_one_304(stub_api, sync_file):
+    sync_promotions('token', sync_file, process_promotions)
+    mtime = os.path.getmtime(sync_file)
+    stub_api.requests.clear()
+
+    delta = sync_promotions('token', sync_file, process_promotions)
+    assert delta['not_modified'] and delta['fetched'] == 0
+    assert stub_api.pages() == [1]
+    assert os.path.getmtime(sync_file) == mtime
+
+
+def test_processing_version_change_forces_full_resync(stub_api, sync_file, monkeypatch):
+    sync_promotions('token', sync_file, process_promotions)
+    monkeypatch.setattr(sync, 'PROCESSING_VERSION', sync.PROCESSING_VERSION + 1)
+    stub_api.requests.clear()
+
+    delta = sync_promotions('token', sync_file, lambda raw: [dict(p, keywords=['new']) for p in process_promotions(raw)])
+    assert delta['full'] and not delta['not_modified']
+    assert len(delta['changed']) == 250
+    assert all(p['keywords'] == ['new'] for p in json.loads(sync_file.read_text(encoding='utf-8')))
+    assert load_state(sync_file)['processing_version'] == sync.PROCESSING_VERSION
+
+    # State from before processing versions existed is treated the same way
+    state = load_state(sync_file)
+    del state['processing_version']
+    state_path(sync_file).write_text(json.dumps(state), encoding='utf-8')
+    assert sync_promotions('token', sync_file, process_promotions)['full']
+
+
+def test_read_only_deploy_only_expires(monkeypatch, engine, promotions):
+    monkeypatch.setattr(SearchEngine, 'data_writable', staticmethod(lambda: False))
+    monkeypatch.setattr(search_engine_module, 'DATA_MAX_AGE', 0)
+    monkeypatch.setattr(fetcher, 'login', lambda: pytest.fail('fetched although the data can not be saved'))
+    assert engine.check_and_update_data() is None
+
+    promotions[0]['end_date'] = '2000-01-01 00:00:00'
+    engine._publish(SearchSnapshot.build(active_records(promotions, now=946000000), 2, NORMALIZED_STOP_WORDS))
+    engine.refresh()
+    assert sorted(r.id for r in engine.promotions) == [2, 3, 4, 5, 6]
+
+
+def test_refresh_saves_the_published_snapshot(monkeypatch, tmp_path, engine, data_file, promotions):
+    path = tmp_path / 'promotions.snapshot'
+    monkeypatch.setattr(search_engine_module, 'SNAPSHOT_FILE', path)
+    upsert = dict(promotions[2], title='Samsung Galaxy S26 Trade In')
+
+    def check_and_update_data():
+        synced = [upsert] + [p for p in promotions if p['id'] not in (3, 6)]
+        data_file.write_text(json.dumps(synced, ensure_ascii=False), encoding='utf-8')
+        return {'upserts': [upsert], 'removed': [6], 'not_modified': False}
+
+    monkeypatch.setattr(engine, 'check_and_update_data', check_and_update_data)
+    monkeypatch.setattr(search_engine_module, 'build_snapshot', lambda *args: pytest.fail('index rebuilt'))
+    engine.refresh()
+
+    saved = load_snapshot(path, source_digest(data_file.read_bytes()), datetime.now().year, index_config_digest())
+    assert [r.id for r in saved.promotions] == [r.id for r in engine.promotions] == [3, 1, 2, 4, 5]
+    assert result_ids(engine, saved, 's26') == [3]
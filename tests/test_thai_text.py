@@ -0,0 +1,38 @@
+from src.utils.thai_text import ThaiSegmenter, normalize, normalize_with_offsets, tokenize
+
+
+def test_normalize_folds_spelling_variants():
+    assert normalize('ซัมซุ่ง') == normalize('ซัมซุง') == 'ซัมซุง'
+    assert normalize('เเมค') == 'แมค'
+    assert normalize('ทํา') == 'ทำ'
+    assert normalize('iPhone​') == 'iphone'
+    assert normalize(None) == ''
+
+
+def test_normalize_with_offsets_maps_back_to_original():
+    text = 'โน้ตบุ๊ค'
+    normalized, starts, ends = normalize_with_offsets(text)
+    assert normalized == normalize(text)
+    assert text[starts[0]:ends[-1]] == text
+    # The dropped tone mark belongs to the character before it
+    assert text[starts[1]:ends[1]] == 'น้'
+
+
+def test_segment_thai_run_without_spaces():
+    assert tokenize('ผ่อน0%กับบัตรเครดิตกสิกร') == ['ผอน', '0%', 'กับ', 'บัตรเครดิต', 'กสิกร']
+    assert tokenize('โปรโมชั่นไอโฟน') == ['โปรโมชัน', 'ไอโฟน']
+
+
+def test_segment_mixed_text_and_abbreviations():
+    assert tokenize('iPhone 16 Pro ลดราคา') == ['iphone', '16', 'pro', 'ลดราคา']
+    assert tokenize('ก.พ. 2569') == ['ก.พ.', '2569']
+
+
+def test_unknown_characters_stay_one_token():
+    segmenter = ThaiSegmenter()
+    assert segmenter.tokenize('กสิกรฮฮฮบัตร') == ['กสิกร', 'ฮฮฮ', 'บัตร']
+
+
+def test_custom_words():
+    segmenter = ThaiSegmenter(['ฮฮฮ'])
+    assert 'ฮฮฮ' in segmenter.tokenize('ฮฮฮบัตร')